@@ -2,7 +2,8 @@
 # home/admin.py
 from django.contrib import admin
 from .models import VideoReview
-from .models import LeadModel, LeadAttachment
+from .models import LeadModel, LeadAttachment, OutboxEmail
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
     Project,
@@ -28,8 +29,8 @@ class TestimonialAdmin(admin.ModelAdmin):
 
 class ImageInline(admin.TabularInline):
     extra = 1
-    fields = ("preview", "image", "caption", "sort_order")
-    readonly_fields = ("preview",)
+    fields = ("preview", "image", "caption", "sort_order", "processing_status")
+    readonly_fields = ("preview", "processing_status")
 
     def preview(self, obj):
         if obj.image:
@@ -61,7 +62,7 @@ class ProjectTagAdmin(admin.ModelAdmin):
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
-    list_display = ("project_name", "cover_preview", "created_at", "order")
+    list_display = ("project_name", "cover_preview", "processing_status", "created_at", "order")
     list_editable = ("order",)  # 👈 edit order inline
     ordering = ("order",)
     search_fields = ("project_name",)
@@ -81,8 +82,8 @@ class ProjectAdmin(admin.ModelAdmin):
 class LeadAttachmentInline(admin.TabularInline):
     model = LeadAttachment
     extra = 0
-    fields = ("file", "uploaded_at")
-    readonly_fields = ("uploaded_at",)
+    fields = ("file", "web_video", "duration", "processing_status", "uploaded_at")
+    readonly_fields = ("web_video", "duration", "processing_status", "uploaded_at")
 
 @admin.register(LeadModel)
 class LeadAdmin(admin.ModelAdmin):
@@ -98,9 +99,31 @@ class LeadAdmin(admin.ModelAdmin):
 
 @admin.register(VideoReview)
 class VideoReviewAdmin(admin.ModelAdmin):
-    list_display = ("order", "title", "customer_name", "is_active", "is_featured", "created_at")
+    list_display = ("order", "title", "customer_name", "is_active", "is_featured", "processing_status", "created_at")
     list_display_links = ("title",)   # ✅ make title the clickable link
     list_editable = ("order", "is_active", "is_featured")
     search_fields = ("title", "customer_name")
     list_filter = ("is_active", "is_featured")
     ordering = ("order", "-created_at")
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "to")
+    readonly_fields = ("attempts", "last_error", "created_at", "sent_at")
+    actions = ["retry_now"]
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        # Not rows being sent right now (or already sent): resetting a
+        # `sending` row would let a second worker send it again
+        updated = queryset.filter(
+            status__in=[OutboxEmail.Status.PENDING, OutboxEmail.Status.FAILED]
+        ).update(
+            status=OutboxEmail.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} email(s) queued for retry.")
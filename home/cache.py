@@ -0,0 +1,136 @@
+"""
+Versioned caching helpers for the home app.
+
+Cached entries are stored under the current version of a content group
+(e.g. "projects"). Saving or deleting content bumps the group's version
+(see home/signals.py), so stale entries are never read again and simply
+expire, instead of having to be found and deleted one by one.
+
+Views, context processors and template tags should go through these
+helpers rather than `django.core.cache` directly: keys get the "home:"
+namespace, and where the data lives (settings.CACHES) stays one decision.
+"""
+import hashlib
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.http import HttpResponse
+
+
+@lru_cache(maxsize=1)
+def release():
+    """
+    Identifies the deployed code and static files: settings.RELEASE_ID, or
+    else a hash of the staticfiles manifest. Cached HTML embeds hashed
+    asset URLs, so every key carries it and a deploy starts cold instead of
+    serving pages that point at the previous (or deleted) assets.
+    """
+    if settings.RELEASE_ID:
+        return settings.RELEASE_ID
+    read_manifest = getattr(staticfiles_storage, "read_manifest", None)
+    manifest = read_manifest() if read_manifest else None
+    if not manifest:
+        return "dev"
+    return hashlib.sha1(manifest.encode()).hexdigest()[:12]
+
+
+def _version_key(group):
+    return f"home:version:{group}"
+
+
+# Content every full page depends on (the footer's recent video reviews)
+PAGE_GROUPS = ("video_reviews",)
+
+
+def _new_version():
+    """
+    Seed for a missing version key. Caches may cull or evict the key itself,
+    so a fresh seed must be past any version handed out before: the clock in
+    nanoseconds is, as long as a group sees fewer bumps than nanoseconds pass.
+    """
+    return time.time_ns()
+
+
+def get_versions(groups):
+    """Current version of each group, fetched in one cache round trip."""
+    keys = {_version_key(group): group for group in groups}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        seed = _new_version()
+        cache.add(key, seed, timeout=None)
+        found[key] = cache.get(key, seed)
+    return {group: found[key] for key, group in keys.items()}
+
+
+def get_version(group):
+    return get_versions([group])[group]
+
+
+def bump_version(group):
+    """Invalidate everything cached for `group` once the transaction commits."""
+    def bump():
+        try:
+            cache.incr(_version_key(group))
+        except ValueError:
+            cache.set(_version_key(group), _new_version(), timeout=None)
+    transaction.on_commit(bump)
+
+
+def versioned_key(groups, *parts):
+    """Cache key under the current version of one or more content groups."""
+    if isinstance(groups, str):
+        groups = [groups]
+    versions = get_versions(groups)
+    tags = [f"{group}.v{versions[group]}" for group in groups]
+    return ":".join(["home", release(), *tags, *map(str, parts)])
+
+
+def get_versioned(groups, key, default=None):
+    """cache.get() under the current version of `groups`."""
+    return cache.get(versioned_key(groups, key), default)
+
+
+def set_versioned(groups, key, value, timeout=DEFAULT_TIMEOUT):
+    """cache.set() under the current version of `groups`."""
+    cache.set(versioned_key(groups, key), value, timeout)
+
+
+def get_or_set_versioned(groups, key, default, timeout=DEFAULT_TIMEOUT):
+    """cache.get_or_set() under the current version of `groups`."""
+    return cache.get_or_set(versioned_key(groups, key), default, timeout)
+
+
+def cache_page_versioned(group, timeout=DEFAULT_TIMEOUT):
+    """
+    Cache a view's successful GET responses (body and headers) under
+    `group`'s content version. Cache hits return before the view runs, so
+    they cost no DB queries. Bypassed under DEBUG, where image workers run
+    in another process and their version bumps don't reach a locmem cache.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.DEBUG or request.method not in ("GET", "HEAD") or request.GET:
+                return view(request, *args, **kwargs)
+
+            key = versioned_key([group, *PAGE_GROUPS], "page", request.path)
+            cached = cache.get(key)
+            if cached is not None:
+                content, headers = cached
+                response = HttpResponse(content)
+                for header, value in headers:
+                    response[header] = value
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                response = response.render() if hasattr(response, "render") else response
+                cache.set(key, (response.content, list(response.items())), timeout)
+            return response
+        return wrapper
+    return decorator
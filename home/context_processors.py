@@ -1,8 +1,35 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .cache import PAGE_GROUPS, get_or_set_versioned, get_versions, release
 from .models import VideoReview
 
+
+def recent_video_reviews():
+    return list(
+        VideoReview.objects.filter(is_active=True).order_by("-created_at")[:2]
+    )
+
+
 def footer_video_reviews(request):
+    # Lazy: only pages that render the footer touch the cache, and the
+    # query only runs after a VideoReview change (home/signals.py).
+    return {
+        "footer_video_reviews": SimpleLazyObject(
+            lambda: get_or_set_versioned("video_reviews", "footer", recent_video_reviews)
+        )
+    }
+
+
+def chrome_cache(request):
+    # For the {% cache %} blocks around navbar/footer in base.html: the
+    # fragments are keyed on the release (they embed hashed static URLs)
+    # and the content versions they depend on, and not cached at all in
+    # DEBUG so template edits show up right away.
     return {
-        "footer_video_reviews": VideoReview.objects.filter(
-            is_active=True
-        ).order_by("-created_at")[:2]
-    }
\ No newline at end of file
+        "chrome_cache_timeout": 0 if settings.DEBUG else settings.CHROME_FRAGMENT_TIMEOUT,
+        "chrome_cache_release": release(),
+        "chrome_cache_version": SimpleLazyObject(
+            lambda: ".".join(str(v) for v in get_versions(PAGE_GROUPS).values())
+        ),
+    }
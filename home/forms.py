@@ -2,7 +2,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .models import LeadModel
+from .models import ChunkedUpload, LeadModel
 
 
 # --- Upload limits (tweak if you want) ---
@@ -51,6 +51,9 @@ class LeadForm(forms.ModelForm):
         help_text=f"Up to {LEAD_MAX_FILES} files. Max {LEAD_MAX_FILE_SIZE_MB}MB each (max {LEAD_MAX_TOTAL_SIZE_MB}MB total).",
     )
 
+    # Ids of attachments already sent through the chunked upload API
+    upload_ids = forms.CharField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = LeadModel
         fields = ['name', 'email', 'phone', 'consultation_types', 'message']
@@ -90,3 +93,31 @@ class LeadForm(forms.ModelForm):
                 )
 
         return files
+
+    def clean_upload_ids(self):
+        """Resolve chunked-upload ids and apply the limits across both upload paths."""
+        raw = [v.strip() for v in (self.cleaned_data.get("upload_ids") or "").split(",") if v.strip()]
+        if not raw:
+            return []
+
+        try:
+            uploads = list(ChunkedUpload.objects.filter(
+                pk__in=raw, status=ChunkedUpload.Status.COMPLETE
+            ))
+        except ValidationError:
+            raise ValidationError("Invalid upload reference.")
+        if len(uploads) != len(set(raw)):
+            raise ValidationError("Some uploads are missing or unfinished. Please upload them again.")
+
+        files = self.cleaned_data.get("attachments") or []
+        if len(files) + len(uploads) > LEAD_MAX_FILES:
+            raise ValidationError(f"Please upload up to {LEAD_MAX_FILES} files.")
+
+        total_size = sum(u.size for u in uploads) + sum(getattr(f, "size", 0) or 0 for f in files)
+        if total_size > LEAD_MAX_TOTAL_SIZE:
+            raise ValidationError(
+                f"Total upload size exceeds {LEAD_MAX_TOTAL_SIZE_MB}MB limit. "
+                f"Please upload fewer files or shorter videos."
+            )
+
+        return uploads
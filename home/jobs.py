@@ -0,0 +1,191 @@
+"""
+DB-backed background job queue for CPU-heavy image and video work.
+
+Every model that inherits ProcessingStatusModel carries its own job state,
+so the queue is just "rows with processing_status=pending". A worker claims
+a row with a conditional UPDATE (pending -> processing), which is safe with
+any number of worker processes polling the same table.
+
+Run the workers with:  python manage.py process_image_jobs
+                        python manage.py process_media_jobs   (ffmpeg)
+"""
+import traceback
+from datetime import timedelta
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+# Models are referenced by label so this module can be imported by
+# freshly spawned worker processes before the app registry is ready.
+IMAGE_JOB_MODELS = [
+    "home.Project",
+    "home.ProjectBeforeImage",
+    "home.ProjectConstructionImage",
+    "home.ProjectAfterImage",
+]
+
+# Video transcoding is much slower than image work, so it gets its own
+# worker pool and never holds up covers/watermarks.
+MEDIA_JOB_MODELS = [
+    "home.VideoReview",
+    "home.LeadAttachment",
+]
+
+
+def init_worker():
+    """ProcessPoolExecutor initializer: make sure Django is set up."""
+    if not apps.ready:
+        django.setup()
+
+
+def pending_jobs(labels=IMAGE_JOB_MODELS, limit=100):
+    """Return up to `limit` (label, pk) pairs that are ready to run."""
+    from .models import ProcessingStatus
+
+    retry_after = timezone.now() - timedelta(seconds=settings.IMAGE_JOB_RETRY_DELAY)
+    jobs = []
+    for label in labels:
+        model = apps.get_model(label)
+        pks = model.objects.filter(
+            Q(processing_attempts=0) | Q(processing_updated_at__lte=retry_after),
+            processing_status=ProcessingStatus.PENDING,
+        ).order_by("pk").values_list("pk", flat=True)[:limit - len(jobs)]
+        jobs.extend((label, pk) for pk in pks)
+        if len(jobs) >= limit:
+            break
+    return jobs
+
+
+def release_jobs(queryset, error):
+    """
+    Give rows claimed by a worker that died back to the queue, or park them
+    as failed once they are out of attempts (the lost run was counted when
+    the row was claimed), so a job that kills its worker every time can't
+    loop forever. Returns (requeued, failed) counts.
+    """
+    from .models import ProcessingStatus
+
+    claimed = queryset.filter(processing_status=ProcessingStatus.PROCESSING)
+    fields = {"processing_error": error, "processing_updated_at": timezone.now()}
+    max_attempts = settings.IMAGE_JOB_MAX_ATTEMPTS
+    requeued = claimed.filter(processing_attempts__lt=max_attempts).update(
+        processing_status=ProcessingStatus.PENDING, **fields
+    )
+    failed = claimed.filter(processing_attempts__gte=max_attempts).update(
+        processing_status=ProcessingStatus.FAILED, **fields
+    )
+    return requeued, failed
+
+
+def requeue_stale(labels=IMAGE_JOB_MODELS, older_than=timedelta(minutes=30)):
+    """
+    Release jobs left in `processing` by a crashed worker (see release_jobs).
+    Returns (requeued, failed) counts.
+    """
+    cutoff = timezone.now() - older_than
+    requeued = failed = 0
+    for label in labels:
+        stale = apps.get_model(label).objects.filter(processing_updated_at__lte=cutoff)
+        counts = release_jobs(stale, "Worker stopped before the job finished.")
+        requeued += counts[0]
+        failed += counts[1]
+    return requeued, failed
+
+
+def run_job(label, pk):
+    """
+    Claim and run a single job. Returns the resulting status, or None if
+    another worker claimed the row first. Workers go through run_worker_job().
+    """
+    from .models import ProcessingStatus
+
+    model = apps.get_model(label)
+
+    claimed = model.objects.filter(
+        pk=pk, processing_status=ProcessingStatus.PENDING
+    ).update(
+        processing_status=ProcessingStatus.PROCESSING,
+        processing_attempts=F("processing_attempts") + 1,
+        processing_updated_at=timezone.now(),
+    )
+    if not claimed:
+        return None
+
+    instance = model.objects.get(pk=pk)
+    try:
+        updates = instance.process() or {}
+    except Exception:
+        # Retry until the attempt budget is used up, then park as failed
+        if instance.processing_attempts >= settings.IMAGE_JOB_MAX_ATTEMPTS:
+            status = ProcessingStatus.FAILED
+        else:
+            status = ProcessingStatus.PENDING
+        model.objects.filter(pk=pk).update(
+            processing_status=status,
+            processing_error=traceback.format_exc(),
+            processing_updated_at=timezone.now(),
+        )
+        return status
+
+    model.objects.filter(pk=pk).update(
+        processing_status=ProcessingStatus.DONE,
+        processing_error="",
+        processing_updated_at=timezone.now(),
+        **updates,
+    )
+    instance.delete_retired_files()
+    instance.processing_finished()
+    return ProcessingStatus.DONE
+
+
+def run_worker_job(label, pk):
+    """
+    run_job() in a worker process: like a request, start by dropping a
+    connection that is broken or past CONN_MAX_AGE. Never call this
+    inline, where the connection belongs to the caller's transaction.
+    """
+    close_old_connections()
+    return run_job(label, pk)
+
+
+def rebuild_chunk(label, pks):
+    """
+    Regenerate all derivatives for a chunk of rows (rebuild_project_images).
+    Returns (processed, failed) counts.
+    """
+    from .models import ProcessingStatus
+
+    close_old_connections()
+    model = apps.get_model(label)
+    processed = failed = 0
+
+    for instance in model.objects.filter(pk__in=pks).iterator():
+        # One bad row must not abort the rest of the chunk. Until the UPDATE
+        # succeeds the row keeps its old files (see retire_file)
+        try:
+            updates = instance.rebuild() or {}
+            model.objects.filter(pk=instance.pk).update(
+                processing_status=ProcessingStatus.DONE,
+                processing_error="",
+                processing_updated_at=timezone.now(),
+                **updates,
+            )
+        except Exception:
+            failed += 1
+            model.objects.filter(pk=instance.pk).update(
+                processing_status=ProcessingStatus.FAILED,
+                processing_error=traceback.format_exc(),
+                processing_updated_at=timezone.now(),
+            )
+            continue
+
+        processed += 1
+        instance.delete_retired_files()
+        instance.processing_finished()
+
+    return processed, failed
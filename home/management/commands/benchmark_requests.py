@@ -0,0 +1,113 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+DEFAULT_URLS = ["/", "/videoreviews/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure request latency in-process and count the database connections "
+        "opened. With --compare, runs once with CONN_MAX_AGE=0 (a new connection "
+        "per request) and once with the configured value."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url", action="append", default=[], metavar="PATH",
+            help=f"Path to request, round-robin (may be given several times; default: {' '.join(DEFAULT_URLS)}).",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200,
+            help="Timed requests per run.",
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=10,
+            help="Untimed requests before each run.",
+        )
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Clear the cache before every request so each one reaches the database.",
+        )
+        parser.add_argument(
+            "--compare", action="store_true",
+            help="Run without persistent connections first, then with the configured CONN_MAX_AGE.",
+        )
+
+    def handle(self, *args, **options):
+        urls = options["url"] or DEFAULT_URLS
+        db = connections["default"]
+        configured = db.settings_dict["CONN_MAX_AGE"]
+
+        ages = [0, configured] if options["compare"] else [configured]
+        if options["compare"] and not configured:
+            ages[1] = 600  # the production default
+
+        self.stdout.write(
+            f"{db.vendor} at {db.settings_dict['HOST'] or 'local'}, "
+            f"{options['requests']} request(s) per run over: {' '.join(urls)}"
+        )
+        try:
+            for age in ages:
+                db.close()
+                db.settings_dict["CONN_MAX_AGE"] = age
+                self.report(f"CONN_MAX_AGE={age}", self.run(urls, options))
+        finally:
+            db.close()
+            db.settings_dict["CONN_MAX_AGE"] = configured
+
+    def run(self, urls, options):
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == "default":
+                opened.append(connection.alias)
+
+        client = Client(HTTP_HOST=self.get_host())
+        timings = []
+        connection_created.connect(count_connection)
+        try:
+            total = options["warmup"] + max(1, options["requests"])
+            for i in range(total):
+                if i == options["warmup"]:
+                    opened.clear()
+                if options["cold"]:
+                    cache.clear()
+
+                url = urls[i % len(urls)]
+                start = time.perf_counter()
+                # The test client skips close_old_connections(); call it the
+                # way a real request cycle does, so CONN_MAX_AGE applies.
+                close_old_connections()
+                response = client.get(url)
+                close_old_connections()
+                elapsed = time.perf_counter() - start
+
+                if response.status_code >= 400:
+                    raise CommandError(f"GET {url} returned {response.status_code}")
+                if i >= options["warmup"]:
+                    timings.append(elapsed * 1000)
+        finally:
+            connection_created.disconnect(count_connection)
+
+        return timings, len(opened)
+
+    def report(self, label, result):
+        timings, opened = result
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label}: mean {statistics.mean(timings):.2f} ms, "
+            f"p50 {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms, "
+            f"max {timings[-1]:.2f} ms, {opened} connection(s) opened"
+        )
+
+    def get_host(self):
+        hosts = [h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"]
+        return hosts[0] if hosts else "localhost"
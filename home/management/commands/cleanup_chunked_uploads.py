@@ -0,0 +1,36 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from home.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = "Delete chunked uploads that were abandoned or never attached to a lead."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=int, default=settings.CHUNKED_UPLOAD_EXPIRY_HOURS,
+            help="Remove uploads untouched for this many hours.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        count = 0
+        for upload in ChunkedUpload.objects.filter(updated_at__lt=cutoff).iterator():
+            upload.discard()
+            count += 1
+
+        # Partial/spool files whose row is gone (e.g. a worker died mid-chunk)
+        temp_dir = settings.CHUNKED_UPLOAD_TEMP_DIR
+        if os.path.isdir(temp_dir):
+            for name in os.listdir(temp_dir):
+                path = os.path.join(temp_dir, name)
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff.timestamp():
+                    os.remove(path)
+                    count += 1
+
+        self.stdout.write(f"Removed {count} abandoned upload(s).")
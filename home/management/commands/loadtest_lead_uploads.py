@@ -0,0 +1,189 @@
+import asyncio
+import statistics
+import time
+import uuid
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+CHUNK = 16 * 1024
+
+
+async def http_request(host, port, method, path, headers=(), body=b"", rate=None, timeout=120):
+    """
+    Minimal HTTP/1.1 client: sends `body` at `rate` bytes/s (all at once if
+    None) and returns (status, raw header block) once the server closes.
+    """
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close"]
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+        for start in range(0, len(body), CHUNK):
+            piece = body[start:start + CHUNK]
+            writer.write(piece)
+            await writer.drain()
+            if rate:
+                await asyncio.sleep(len(piece) / rate)
+
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+
+    status_line, _, rest = response.partition(b"\r\n")
+    if not status_line:
+        raise ConnectionError("empty response")
+    return int(status_line.split()[1]), rest.split(b"\r\n\r\n", 1)[0].decode("latin-1")
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content_type, data) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode() + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many slow, concurrent lead uploads (contact form with an attachment) "
+        "against a RUNNING server and report how many complete and how responsive "
+        "the rest of the site stays meanwhile. Run it once per deployment to compare, e.g. "
+        "`gunicorn parvizconstruction.wsgi -w 4` against "
+        "`LEAD_INTAKE_ASYNC=1 gunicorn parvizconstruction.asgi -k uvicorn.workers.UvicornWorker -w 4`. "
+        "Every successful upload creates a real lead: use a local or staging database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url", default="http://127.0.0.1:8000",
+            help="Base URL of the server under test (plain HTTP).",
+        )
+        parser.add_argument(
+            "--clients", type=int, default=50,
+            help="Concurrent uploads.",
+        )
+        parser.add_argument(
+            "--file-kb", type=int, default=1024,
+            help="Attachment size per upload, in KB.",
+        )
+        parser.add_argument(
+            "--rate-kbps", type=float, default=128,
+            help="Upload speed of each simulated client, in KB/s.",
+        )
+        parser.add_argument(
+            "--probe-path", default="/",
+            help="Page fetched repeatedly during the test to measure responsiveness.",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=300,
+            help="Seconds before a request counts as failed.",
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("--url must be a plain http:// URL.")
+        self.host, self.port = url.hostname, url.port or 80
+        self.timeout = options["timeout"]
+
+        expected = options["file_kb"] / options["rate_kbps"]
+        self.stdout.write(
+            f"{options['clients']} client(s) uploading {options['file_kb']} KB at "
+            f"{options['rate_kbps']:g} KB/s (~{expected:.1f}s each) to {options['url']}/contact/"
+        )
+        results = asyncio.run(self.run(options))
+        self.report(results, expected)
+
+    async def run(self, options):
+        status, headers = await http_request(self.host, self.port, "GET", "/contact/", timeout=self.timeout)
+        cookie = SimpleCookie()
+        for line in headers.split("\r\n"):
+            if line.lower().startswith("set-cookie:"):
+                cookie.load(line.split(":", 1)[1].strip())
+        if status != 200 or "csrftoken" not in cookie:
+            raise CommandError(f"GET /contact/ returned {status} without a CSRF cookie.")
+        token = cookie["csrftoken"].value
+
+        # JPEG magic bytes so the upload handler accepts it
+        data = b"\xff\xd8\xff\xe0" + bytes(options["file_kb"] * 1024 - 4)
+        body, content_type = multipart(
+            {
+                "csrfmiddlewaretoken": token,
+                "name": "Load test",
+                "email": "loadtest@example.com",
+                "phone": "0000000000",
+                "message": "loadtest_lead_uploads",
+            },
+            {"attachments": ("loadtest.jpg", "image/jpeg", data)},
+        )
+        headers = [("Content-Type", content_type), ("Cookie", f"csrftoken={token}")]
+        rate = options["rate_kbps"] * 1024
+
+        async def upload():
+            started = time.monotonic()
+            try:
+                status, _ = await http_request(
+                    self.host, self.port, "POST", "/contact/", headers, body, rate, self.timeout
+                )
+            except (OSError, asyncio.TimeoutError, ValueError) as exc:
+                return False, time.monotonic() - started, type(exc).__name__
+            return status == 302, time.monotonic() - started, status
+
+        uploads = [asyncio.create_task(upload()) for _ in range(options["clients"])]
+        probes = []
+        while not all(task.done() for task in uploads):
+            started = time.monotonic()
+            try:
+                status, _ = await http_request(
+                    self.host, self.port, "GET", options["probe_path"], timeout=self.timeout
+                )
+                probes.append((status == 200, time.monotonic() - started))
+            except (OSError, asyncio.TimeoutError, ValueError):
+                probes.append((False, time.monotonic() - started))
+            await asyncio.sleep(0.25)
+
+        return [task.result() for task in uploads], probes
+
+    def report(self, results, expected):
+        uploads, probes = results
+        ok = [elapsed for success, elapsed, _ in uploads if success]
+        errors = {}
+        for success, _, outcome in uploads:
+            if not success:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+        self.stdout.write(f"Uploads: {len(ok)}/{len(uploads)} completed" + (
+            f", failures: {', '.join(f'{k} x{v}' for k, v in errors.items())}" if errors else ""
+        ))
+        if ok:
+            self.stdout.write(
+                f"  duration: median {statistics.median(ok):.1f}s, max {max(ok):.1f}s "
+                f"(network alone: {expected:.1f}s)"
+            )
+
+        latencies = [elapsed * 1000 for success, elapsed in probes if success]
+        self.stdout.write(
+            f"Probe requests during the test: {len(latencies)}/{len(probes)} ok"
+            + (
+                f", p50 {percentile(latencies, 0.5):.0f} ms, p95 {percentile(latencies, 0.95):.0f} ms, "
+                f"max {max(latencies):.0f} ms" if latencies else ""
+            )
+        )
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from home.models import RENDITION_FORMATS, RENDITION_SAVE_OPTIONS
+from home.static_images import MANIFEST_NAME, OUTPUT_DIR
+
+SOURCE_EXTENSIONS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg"}
+SAVE_OPTIONS = {**RENDITION_SAVE_OPTIONS, "png": {"format": "PNG", "optimize": True}}
+
+
+def file_digest(path):
+    with open(path, "rb") as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def optimize_image(static_root, name, widths):
+    """
+    Write every width/format variant of static file `name` and return its
+    manifest entry. The fallback keeps the source format (PNG stays
+    lossless); AVIF/WebP variants are only kept where they are smaller.
+    """
+    source = os.path.join(static_root, name)
+    fallback = SOURCE_EXTENSIONS[os.path.splitext(name)[1].lower()]
+
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ("RGBA", "LA") or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+
+    width, height = img.size
+    # Every configured width below the source's, plus the largest one we
+    # keep (a set: for sources wider than max(widths) the two overlap)
+    targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+    base = os.path.splitext(name)[0]
+    formats = {fmt: [] for fmt in RENDITION_FORMATS if fmt in ("avif", "webp")}
+    formats[fallback] = []
+
+    for target in targets:
+        resized = img if target == width else img.resize(
+            (target, round(height * target / width)), Image.Resampling.LANCZOS
+        )
+        sizes = {}
+        for fmt in formats:
+            frame = resized.convert("RGB") if fmt == "jpeg" and resized.mode != "RGB" else resized
+            out_name = f"{OUTPUT_DIR}/{base}-{target}.{'jpg' if fmt == 'jpeg' else fmt}"
+            out_path = os.path.join(static_root, out_name)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            frame.save(out_path, **SAVE_OPTIONS[fmt])
+            sizes[fmt] = (os.path.getsize(out_path), out_name)
+
+        for fmt, (size, out_name) in sizes.items():
+            if fmt != fallback and size >= sizes[fallback][0]:
+                os.remove(os.path.join(static_root, out_name))
+                continue
+            formats[fmt].append([target, out_name])
+
+    return {
+        "digest": file_digest(source),
+        "width": width,
+        "height": height,
+        "fallback": fallback,
+        "formats": {fmt: entries for fmt, entries in formats.items() if entries},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompress the images under static/ and write AVIF/WebP variants at several "
+        "widths plus a manifest for the {% static_picture %} tag. Run before collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path", action="append", default=[], metavar="DIR",
+            help="Directory under static/ to optimize (may be given several times; default: images).",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Re-encode images even if the source has not changed.",
+        )
+
+    def handle(self, *args, **options):
+        static_root = str(settings.STATICFILES_DIRS[0])
+        manifest_path = os.path.join(static_root, OUTPUT_DIR, MANIFEST_NAME)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as fh:
+                manifest = json.load(fh)
+
+        names = []
+        for directory in options["path"] or ["images"]:
+            top = os.path.join(static_root, directory)
+            if not os.path.isdir(top):
+                raise CommandError(f"{top} is not a directory.")
+            for root, dirs, files in os.walk(top):
+                # never re-optimize our own output
+                dirs[:] = [d for d in dirs if os.path.join(root, d) != os.path.join(static_root, OUTPUT_DIR)]
+                for filename in sorted(files):
+                    if os.path.splitext(filename)[1].lower() in SOURCE_EXTENSIONS:
+                        names.append(os.path.relpath(os.path.join(root, filename), static_root).replace(os.sep, "/"))
+
+        todo = [
+            name for name in names
+            if options["force"]
+            or manifest.get(name, {}).get("digest") != file_digest(os.path.join(static_root, name))
+        ]
+        self.stdout.write(f"{len(names)} image(s), {len(todo)} to optimize.")
+
+        started = time.monotonic()
+        failed = 0
+        widths = settings.STATIC_IMAGE_WIDTHS
+        with ProcessPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            futures = {pool.submit(optimize_image, static_root, name, widths): name for name in todo}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    manifest[name] = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{name}: {exc}")
+
+        # Forget images that no longer exist
+        manifest = {
+            name: entry for name, entry in sorted(manifest.items())
+            if os.path.exists(os.path.join(static_root, name))
+        }
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(manifest_path, "w") as fh:
+            json.dump(manifest, fh, indent=1)
+
+        before = after = 0
+        for name, entry in manifest.items():
+            before += os.path.getsize(os.path.join(static_root, name))
+            largest = entry["formats"][entry["fallback"]][-1][0]
+            after += min(
+                os.path.getsize(os.path.join(static_root, out_name))
+                for entries in entry["formats"].values()
+                for width, out_name in entries
+                if width == largest
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.monotonic() - started:.1f}s: {len(todo) - failed} optimized, {failed} failed. "
+            f"Full-size images: {before / 1e6:.1f} MB originals -> {after / 1e6:.1f} MB smallest variants."
+        ))
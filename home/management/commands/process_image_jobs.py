@@ -0,0 +1,134 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from home.jobs import (
+    IMAGE_JOB_MODELS,
+    init_worker,
+    pending_jobs,
+    release_jobs,
+    requeue_stale,
+    run_worker_job,
+)
+
+
+class Command(BaseCommand):
+    help = "Run background image jobs (watermarks, cover resizing) on a local process pool."
+
+    job_models = IMAGE_JOB_MODELS
+    job_kind = "image"
+    default_workers = os.cpu_count() or 1
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=self.default_workers,
+            help=f"Number of worker processes (default: {self.default_workers}).",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=5.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            "--stale-minutes", type=int, default=30,
+            help="Re-queue jobs stuck in 'processing' for longer than this.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        stale = timedelta(minutes=options["stale_minutes"])
+
+        requeued, gave_up = requeue_stale(self.job_models, older_than=stale)
+        if requeued or gave_up:
+            self.stdout.write(f"Re-queued {requeued} stale job(s), {gave_up} out of attempts.")
+
+        # Forked workers must not share the parent's DB connection
+        connections.close_all()
+
+        in_flight = {}
+        done = failed = 0
+
+        self.stdout.write(f"Processing {self.job_kind} jobs with {workers} worker(s)...")
+        pool = self.start_pool(workers)
+        try:
+            while True:
+                free = workers * 2 - len(in_flight)
+                if free > 0:
+                    try:
+                        for job in pending_jobs(self.job_models, limit=free + len(in_flight)):
+                            if job not in in_flight.values():
+                                in_flight[pool.submit(run_worker_job, *job)] = job
+                    except BrokenProcessPool:
+                        pool = self.restart_pool(pool, in_flight, workers)
+                        continue
+                    finally:
+                        connections.close_all()
+
+                if not in_flight:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                finished, _ = wait(in_flight, timeout=options["sleep"], return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    label, pk = in_flight[future]
+                    try:
+                        status = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        continue
+                    except Exception as exc:
+                        status = "failed"
+                        self.stderr.write(f"{label} #{pk}: worker crashed ({exc})")
+                    del in_flight[future]
+                    if status == "done":
+                        done += 1
+                    elif status == "failed":
+                        failed += 1
+                        self.stderr.write(f"{label} #{pk}: failed")
+
+                if broken:
+                    pool = self.restart_pool(pool, in_flight, workers)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {done} processed, {failed} failed."))
+
+    def start_pool(self, workers):
+        return ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+
+    def restart_pool(self, pool, in_flight, workers):
+        """
+        A worker process died (segfault, OOM kill) and took the pool with it:
+        release every job that was in flight and start a fresh pool.
+        """
+        pool.shutdown(wait=False, cancel_futures=True)
+        jobs = sorted(set(in_flight.values()))
+        in_flight.clear()
+
+        requeued = gave_up = 0
+        for label in {label for label, _ in jobs}:
+            pks = [pk for job_label, pk in jobs if job_label == label]
+            counts = release_jobs(
+                apps.get_model(label).objects.filter(pk__in=pks),
+                "Worker process died while running the job.",
+            )
+            requeued += counts[0]
+            gave_up += counts[1]
+        connections.close_all()
+
+        self.stderr.write(
+            f"Worker pool broke; re-queued {requeued} job(s), {gave_up} out of attempts. Restarting pool."
+        )
+        return self.start_pool(workers)
@@ -0,0 +1,17 @@
+import os
+
+from home.jobs import MEDIA_JOB_MODELS
+
+from .process_image_jobs import Command as ImageJobsCommand
+
+
+class Command(ImageJobsCommand):
+    help = (
+        "Run background video jobs (web MP4 transcode, poster frame, duration/size) "
+        "on a local process pool. Needs ffmpeg and ffprobe."
+    )
+
+    job_models = MEDIA_JOB_MODELS
+    job_kind = "media"
+    # ffmpeg already uses several threads per encode
+    default_workers = max(1, (os.cpu_count() or 1) // 4)
@@ -0,0 +1,106 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, time as dt_time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from home.jobs import IMAGE_JOB_MODELS, init_worker, rebuild_chunk
+from home.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate watermarked copies, thumbnails and covers for projects "
+        "and their gallery images on a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project", action="append", default=[], metavar="SLUG",
+            help="Only rebuild this project (may be given several times).",
+        )
+        parser.add_argument(
+            "--since", metavar="DATE",
+            help="Only rebuild projects created on/after this date (YYYY-MM-DD or ISO datetime).",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=25,
+            help="Rows handed to a worker at a time.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report what would be rebuilt.",
+        )
+
+    def handle(self, *args, **options):
+        since = self.parse_since(options["since"])
+        chunk_size = max(1, options["chunk_size"])
+
+        # (label, [pk, ...]) chunks for every model
+        chunks = []
+        for label in IMAGE_JOB_MODELS:
+            qs = self.get_queryset(label, options["project"], since)
+            pks = list(qs.order_by("pk").values_list("pk", flat=True))
+            for i in range(0, len(pks), chunk_size):
+                chunks.append((label, pks[i:i + chunk_size]))
+            self.stdout.write(f"{label}: {len(pks)} row(s)")
+
+        total = sum(len(pks) for _, pks in chunks)
+        if options["dry_run"] or not total:
+            self.stdout.write(f"{total} row(s) to rebuild." + (" (dry run)" if options["dry_run"] else ""))
+            return
+
+        # Forked workers must not share the parent's DB connection
+        connections.close_all()
+
+        processed = failed = 0
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=max(1, options["workers"]), initializer=init_worker) as pool:
+            futures = [pool.submit(rebuild_chunk, label, pks) for label, pks in chunks]
+            for future in as_completed(futures):
+                ok, bad = future.result()
+                processed += ok
+                failed += bad
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"[{processed + failed}/{total}] "
+                    f"{(processed + failed) / elapsed:.1f} images/sec"
+                )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {processed} image(s), {failed} failed in {elapsed:.1f}s "
+            f"({processed / elapsed:.1f} images/sec)."
+        ))
+
+    def parse_since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid --since value: {value!r}")
+            since = datetime.combine(day, dt_time.min)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def get_queryset(self, label, slugs, since):
+        model = apps.get_model(label)
+        prefix = "" if model is Project else "project__"
+        qs = model.objects.all()
+        if slugs:
+            qs = qs.filter(**{f"{prefix}slug__in": slugs})
+        if since:
+            qs = qs.filter(**{f"{prefix}created_at__gte": since})
+        return qs
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.outbox import requeue_stale, send_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails in batches over a single SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sleep", type=float, default=10.0,
+            help="Seconds to wait between polls when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Send everything that is due and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f"Re-queued {requeued} stale message(s).")
+
+        while True:
+            sent, failed = send_outbox()
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}.")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
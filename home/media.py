@@ -0,0 +1,122 @@
+"""
+ffmpeg/ffprobe helpers for the background media jobs.
+
+Uploaded videos (video reviews, lead attachments) come straight off phones:
+huge bitrates, rotation flags, the moov atom at the end of the file. The
+media job (see VideoReview.process / LeadAttachment.process) turns each one
+into a web-friendly H.264/AAC MP4 with `+faststart`, so playback starts
+before the whole file has downloaded, and grabs a poster frame.
+
+Run the workers with:  python manage.py process_media_jobs
+"""
+import json
+import mimetypes
+import subprocess
+
+from django.conf import settings
+
+
+class MediaToolError(RuntimeError):
+    """ffmpeg/ffprobe is missing or exited with an error."""
+
+
+def is_video_name(name):
+    content_type, _ = mimetypes.guess_type(name or "")
+    return bool(content_type and content_type.startswith("video/"))
+
+
+def _run(args):
+    try:
+        result = subprocess.run(
+            args,
+            capture_output=True,
+            timeout=settings.MEDIA_JOB_TIMEOUT,
+        )
+    except FileNotFoundError:
+        raise MediaToolError(f"{args[0]} not found; set FFMPEG_BINARY/FFPROBE_BINARY.")
+    except subprocess.TimeoutExpired:
+        raise MediaToolError(f"{args[0]} timed out after {settings.MEDIA_JOB_TIMEOUT}s.")
+
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", "replace").strip()
+        raise MediaToolError(f"{args[0]} exited with {result.returncode}: {stderr[-2000:]}")
+    return result.stdout
+
+
+def probe(path):
+    """
+    Return {"duration", "width", "height"} for the first video stream of
+    `path`, or None if the file has no video stream. Width/height are the
+    displayed size, i.e. with any rotation flag applied.
+    """
+    output = _run([
+        settings.FFPROBE_BINARY,
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "format=duration:stream=width,height:stream_side_data=rotation:stream_tags=rotate",
+        "-of", "json",
+        path,
+    ])
+    data = json.loads(output or b"{}")
+    streams = data.get("streams") or []
+    if not streams:
+        return None
+
+    stream = streams[0]
+    width, height = stream.get("width"), stream.get("height")
+    rotation = stream.get("tags", {}).get("rotate")
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+
+    try:
+        duration = float(data.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+
+    return {"duration": duration, "width": width, "height": height}
+
+
+def transcode_web(src, dst):
+    """
+    Re-encode `src` to an H.264/AAC MP4 at `dst`: capped height and bitrate,
+    rotation baked in, moov atom up front (+faststart) for progressive play.
+    """
+    max_height = settings.MEDIA_WEB_MAX_HEIGHT
+    max_bitrate = settings.MEDIA_WEB_MAX_BITRATE  # kbit/s
+    _run([
+        settings.FFMPEG_BINARY,
+        "-y", "-v", "error",
+        "-i", src,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:'min({max_height},ih)'",
+        "-c:v", "libx264", "-preset", "medium", "-crf", "23",
+        "-maxrate", f"{max_bitrate}k", "-bufsize", f"{2 * max_bitrate}k",
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k",
+        "-movflags", "+faststart",
+        dst,
+    ])
+
+
+def extract_poster(src, dst, duration=None):
+    """Write one JPEG frame of `src` to `dst`, a little way in to skip black intros."""
+    offset = min(1.0, duration / 2) if duration else 0
+    _run([
+        settings.FFMPEG_BINARY,
+        "-y", "-v", "error",
+        "-ss", f"{offset:.2f}",
+        "-i", src,
+        "-frames:v", "1",
+        "-q:v", "3",
+        dst,
+    ])
+
+
+def local_path(file_field):
+    """ffmpeg needs a real file; only local (FileSystemStorage) media is supported."""
+    try:
+        return file_field.path
+    except NotImplementedError:
+        raise MediaToolError("Media jobs need a storage backend with local paths.")
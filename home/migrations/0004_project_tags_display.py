@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:39
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_tags_display(apps, schema_editor):
+    Project = apps.get_model("home", "Project")
+    ProjectTag = apps.get_model("home", "ProjectTag")
+    for project in Project.objects.all():
+        names = ProjectTag.objects.filter(projects=project).order_by("name").values_list("name", flat=True)
+        Project.objects.filter(pk=project.pk).update(tags_display=Truncator(", ".join(names)).chars(500))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0003_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tags_display',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.RunPython(fill_tags_display, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:47
+
+import mimetypes
+
+from django.db import migrations, models
+
+
+def queue_existing_videos(apps, schema_editor):
+    # Existing uploads get transcoded by the next process_media_jobs run
+    for model_name, field in (("VideoReview", "video"), ("LeadAttachment", "file")):
+        model = apps.get_model("home", model_name)
+        pks = [
+            pk for pk, name in model.objects.values_list("pk", field)
+            if (mimetypes.guess_type(name or "")[0] or "").startswith("video/")
+        ]
+        model.objects.filter(pk__in=pks).update(processing_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leadattachment',
+            name='duration',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='poster',
+            field=models.ImageField(blank=True, editable=False, upload_to='lead_attachments/posters/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='processing_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='processing_error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='done', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='processing_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='web_video',
+            field=models.FileField(blank=True, editable=False, upload_to='lead_attachments/web/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='leadattachment',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='duration',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='processing_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='processing_error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='done', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='processing_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='thumbnail_generated',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='web_video',
+            field=models.FileField(blank=True, editable=False, upload_to='video_reviews/web/'),
+        ),
+        migrations.AddField(
+            model_name='videoreview',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(queue_existing_videos, migrations.RunPython.noop),
+    ]
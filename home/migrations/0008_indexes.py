@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_media_transcoding'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', '-created_at'], name='project_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectafterimage',
+            index=models.Index(fields=['project', 'sort_order', 'id'], name='projectafterimage_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='projectbeforeimage',
+            index=models.Index(fields=['project', 'sort_order', 'id'], name='projectbeforeimage_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='projectconstructionimage',
+            index=models.Index(fields=['project', 'sort_order', 'id'], name='projectconstructionimage_sort'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_featured', 'order'], name='testimonial_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoreview',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['order', '-created_at'], name='videoreview_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoreview',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', False)), fields=['order', '-created_at', 'id'], name='videoreview_listed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videoreview',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='videoreview_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_project_gallery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunkedupload',
+            name='client_ip',
+            field=models.GenericIPAddressField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -2,18 +2,102 @@
 from django.db import models
 from multiselectfield import MultiSelectField
 
-from django.utils.text import slugify
+from django.utils.text import Truncator, slugify
 from imagekit.models import ImageSpecField
+from imagekit.cachefiles.backends import CacheFileState
 from imagekit.processors import ResizeToFill
 
 from io import BytesIO
 from PIL import Image, ImageOps, ImageEnhance
-from django.core.files.base import ContentFile
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
 
 from django.conf import settings
+from functools import lru_cache, partial
+import hashlib
+import shutil
+import tempfile
+import uuid
+
+from .cache import bump_version
+from .media import extract_poster, is_video_name, local_path, probe, transcode_web
 import os
 
 
+class ProcessingStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    PROCESSING = "processing", "Processing"
+    DONE = "done", "Done"
+    FAILED = "failed", "Failed"
+
+
+class ProcessingStatusModel(models.Model):
+    """
+    Abstract base for rows whose CPU-heavy work runs in the background
+    job queue (see home/jobs.py). The queue is simply every row with
+    processing_status=pending; subclasses implement process().
+    """
+
+    # Rows start with nothing to do; save() queues work when needed
+    processing_status = models.CharField(
+        max_length=20,
+        choices=ProcessingStatus.choices,
+        default=ProcessingStatus.DONE,
+        editable=False,
+        db_index=True,
+    )
+    processing_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    processing_error = models.TextField(blank=True, editable=False)
+    processing_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def process(self):
+        """
+        Do the heavy work and return a dict of field values to persist.
+        Runs inside a worker process; exceptions trigger a retry.
+        """
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Regenerate every derivative (rebuild_project_images command)."""
+        return self.process()
+
+    def processing_finished(self):
+        """Hook called by the job queue after process() results are saved."""
+
+    def retire_file(self, storage, name):
+        """
+        Delete `name` once process() results are saved, not before: until
+        then the row still points at it, and the job may yet fail.
+        """
+        self.__dict__.setdefault("_retired_files", []).append((storage, name))
+
+    def delete_retired_files(self):
+        for storage, name in self.__dict__.pop("_retired_files", []):
+            storage.delete(name)
+
+    def mark_pending(self):
+        self.processing_status = ProcessingStatus.PENDING
+        self.processing_attempts = 0
+        self.processing_error = ""
+
+    def dispatch_processing(self):
+        """
+        Run the job inline when background workers are disabled, once the
+        saving transaction has committed (the job claims the row with its
+        own UPDATE and must see it).
+        """
+        if not settings.IMAGE_JOBS_ASYNC:
+            from .jobs import run_job
+            transaction.on_commit(partial(run_job, self._meta.label, self.pk))
+
+
 class Testimonial(models.Model):
     name = models.CharField(max_length=100)
     photo = models.ImageField(upload_to="testimonials/")
@@ -26,6 +110,14 @@ class Testimonial(models.Model):
 
     class Meta:
         ordering = ["order"]
+        indexes = [
+            # Home page: active testimonials, featured first, by order
+            models.Index(
+                fields=["-is_featured", "order"],
+                condition=models.Q(is_active=True),
+                name="testimonial_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.order} - {self.name}"
@@ -65,41 +157,237 @@ class Testimonial(models.Model):
             img.save(self.photo.path, optimize=True, quality=85)
 
 
-def resize_image_to_exact(file_field, width=550, height=375, quality=85):
+# -----------------------------------------------------------------------------
+# Derivative pipeline
+# Every derivative of an upload (cover, watermarked copy, thumbnail) is
+# rendered from ONE decode of the source, inside the background job.
+# -----------------------------------------------------------------------------
+
+COVER_SIZE = (550, 375)
+THUMB_SIZE = (600, 400)
+THUMB_QUALITY = 82
+
+
+def open_image(file_field, draft_size=None):
     """
-    Resize the uploaded image file to an exact size (cropping if needed) and
-    overwrite the same ImageField file.
+    Decode an uploaded image once, upright (EXIF orientation applied) and in
+    RGB. With `draft_size`, JPEGs are downscaled while decoding (Image.draft)
+    to the smallest scale that still covers that size in either orientation.
     """
-    if not file_field:
-        return
+    with file_field.open("rb"):
+        img = Image.open(file_field)
+        if draft_size:
+            side = max(draft_size)
+            img.draft("RGB", (side, side))
+        img = ImageOps.exif_transpose(img)  # fixes rotated iPhone images (and loads the pixels)
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
 
+
+def fit_image(img, size):
+    """Exact fit (center-crop) to `size`."""
+    return ImageOps.fit(img, size, method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+
+
+def encode_jpeg(img, quality=85):
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def derived_name(file_field, suffix):
+    """`photo.png` -> `photo<suffix>` (upload_to adds the folder again)."""
+    return os.path.basename(file_field.name).rsplit(".", 1)[0] + suffix
+
+
+def store_cachefile(cachefile, content):
+    """
+    Write a pre-rendered imagekit cache file (e.g. `thumb`) so imagekit never
+    has to decode the source again to generate it.
+    """
+    storage = cachefile.storage
+    if storage.exists(cachefile.name):
+        storage.delete(cachefile.name)
+    storage.save(cachefile.name, content)
+    cachefile.cachefile_backend.set_state(cachefile, CacheFileState.EXISTS)
+
+
+# Watermark widths are rounded up to one of these, so the prepared watermark
+# cache holds a handful of entries however many image sizes get uploaded
+WATERMARK_WIDTH_BUCKETS = (128, 256, 384, 512, 768, 1024, 1536, 2048)
+
+
+def watermark_bucket(width):
+    """Smallest bucket >= `width` (the largest bucket if none is)."""
+    for bucket in WATERMARK_WIDTH_BUCKETS:
+        if bucket >= width:
+            return bucket
+    return WATERMARK_WIDTH_BUCKETS[-1]
+
+
+@lru_cache(maxsize=len(WATERMARK_WIDTH_BUCKETS))
+def _prepared_watermark(path, mtime, bucket, opacity):
+    """
+    Decode watermark.png, scale it to the `bucket` width and apply the
+    opacity. Cached per process; `mtime` is part of the key so a replaced
+    watermark file is picked up without restarting workers.
+    """
+    wm = Image.open(path).convert("RGBA")
+
+    ratio = bucket / wm.width
+    height = int(wm.height * ratio)
+    wm = wm.resize((bucket, height), Image.Resampling.LANCZOS)
+
+    # Opacity
+    alpha = wm.split()[3]
+    alpha = ImageEnhance.Brightness(alpha).enhance(opacity)
+    wm.putalpha(alpha)
+    return wm
+
+
+def get_watermark(width, opacity=0.25):
+    """
+    Return the watermark scaled to `width`, or None if the file is missing.
+    Only the bucket-sized copy is cached; it is resized once more (downwards)
+    to the exact width.
+    """
+    watermark_path = os.path.join(
+        settings.BASE_DIR, "static", "images", "watermark.png"
+    )
     try:
-        img = Image.open(file_field)
-        img = ImageOps.exif_transpose(img)  # fixes rotated iPhone images
+        mtime = os.stat(watermark_path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    wm = _prepared_watermark(watermark_path, mtime, watermark_bucket(width), opacity)
+    if wm.width == width:
+        return wm
+    height = max(1, round(wm.height * width / wm.width))
+    return wm.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def apply_watermark(img, opacity=0.25, scale=0.25, margin=20):
+    """
+    Return a watermarked RGB copy of `img` WITHOUT touching the original,
+    or None when watermark.png is missing.
+    """
+    # Resize watermark relative to image (the bucket copy is shared: do not modify)
+    wm = get_watermark(max(1, int(img.width * scale)), opacity)
+    if wm is None:
+        return None
+
+    base = img.convert("RGBA")
+
+    # Bottom-right
+    x = base.width - wm.width - margin
+    y = base.height - wm.height - margin
+    base.alpha_composite(wm, (x, y))
 
-        # Convert for JPEG saving
-        if img.mode not in ("RGB", "L"):
-            img = img.convert("RGB")
-        elif img.mode == "L":
-            img = img.convert("RGB")
+    return base.convert("RGB")
 
-        # Exact fit (center-crop) to 550x375
-        img = ImageOps.fit(img, (width, height), method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
 
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG", quality=quality, optimize=True)
-        buffer.seek(0)
+class PipelineStrategy:
+    """
+    imagekit cache file strategy for specs the image job renders ahead of
+    time (store_cachefile). Like imagekit's Optimistic strategy, `.url` never
+    touches storage, but nothing is generated in the request when the source
+    is saved either: the job queue does it. Anything that actually reads the
+    file still gets it generated on demand.
+    """
+
+    def on_content_required(self, file):
+        file.generate()
+
+    def should_verify_existence(self, file):
+        return False
+
+
+# Responsive renditions (see home/templatetags/home_images.py)
+RENDITION_WIDTHS = {
+    "cover": (320, 550, 1100),   # project cards (COVER_SIZE aspect)
+    "thumb": (320, 640),         # gallery grid (THUMB_SIZE aspect)
+    "full": (640, 1280, 1920),   # lightbox, watermarked
+}
+RENDITION_SAVE_OPTIONS = {
+    "avif": {"format": "AVIF", "quality": 60, "speed": 8},
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+# Formats this Pillow build can write (AVIF is built in from Pillow 11.2);
+# init() loads every plugin so Image.SAVE is complete
+Image.init()
+RENDITION_FORMATS = [
+    fmt for fmt, options in RENDITION_SAVE_OPTIONS.items() if options["format"] in Image.SAVE
+]
+
+
+def render_renditions(img, file_field, key, aspect=None):
+    """
+    Write `img` at every RENDITION_WIDTHS[key] width (never upscaled) in every
+    available format, next to the original upload. `aspect` (width, height)
+    center-crops each width like fit_image(). Returns
+    {format: [[width, name], ...]} for the `renditions` JSON field.
+    """
+    storage = file_field.storage
+    folder = os.path.join(os.path.dirname(file_field.name), "renditions")
+    stem = derived_name(file_field, "")
+
+    widths = [w for w in RENDITION_WIDTHS[key] if w <= img.width] or [img.width]
+    result = {fmt: [] for fmt in RENDITION_FORMATS}
+
+    # Largest first, each step resampled from the previous one
+    current = img
+    for width in sorted(widths, reverse=True):
+        if aspect:
+            current = fit_image(current, (width, round(width * aspect[1] / aspect[0])))
+        elif width != current.width:
+            current = current.resize(
+                (width, round(current.height * width / current.width)),
+                Image.Resampling.LANCZOS,
+            )
+
+        for fmt in RENDITION_FORMATS:
+            options = RENDITION_SAVE_OPTIONS[fmt]
+            buffer = BytesIO()
+            current.save(buffer, **options)
+            ext = "jpg" if fmt == "jpeg" else fmt
+            name = storage.save(
+                os.path.join(folder, f"{stem}_{key}_{width}.{ext}"),
+                ContentFile(buffer.getvalue()),
+            )
+            result[fmt].insert(0, [width, name])
+    return result
 
-        # Overwrite same file name (but ensure .jpg extension)
-        name = file_field.name
-        if not name.lower().endswith((".jpg", ".jpeg")):
-            name = name.rsplit(".", 1)[0] + ".jpg"
 
-        file_field.save(name, ContentFile(buffer.read()), save=False)
+def rendition_urls(renditions, key):
+    """
+    URLs for one set of render_renditions() output: {"src": largest JPEG,
+    "srcsets": {format: "url 320w, url 640w"}}, or {} if it was not rendered.
+    """
+    formats = (renditions or {}).get(key) or {}
+    srcsets = {
+        fmt: ", ".join(f"{default_storage.url(name)} {width}w" for width, name in entries)
+        for fmt, entries in formats.items()
+        if entries
+    }
+    if not srcsets:
+        return {}
+    jpeg = formats.get("jpeg")
+    return {"src": default_storage.url(jpeg[-1][1]) if jpeg else None, "srcsets": srcsets}
+
+
+def rendition_names(renditions):
+    for formats in (renditions or {}).values():
+        for entries in formats.values():
+            for _width, name in entries:
+                yield name
 
-    except Exception:
-        # If anything goes wrong, do not block saving the model
-        return
+
+def delete_renditions(storage, renditions):
+    for name in rendition_names(renditions):
+        storage.delete(name)
 
 
 def project_upload_to(instance, filename):
@@ -123,7 +411,7 @@ class ProjectTag(models.Model):
         return self.name
 
 
-class Project(models.Model):
+class Project(ProcessingStatusModel):
     project_name = models.CharField(max_length=200)
 
     thumbnail_title = models.CharField(
@@ -139,8 +427,18 @@ class Project(models.Model):
         related_name="projects"
     )
 
+    # Denormalized "Tag A, Tag B" for the listing (kept in sync by signals)
+    tags_display = models.CharField(max_length=500, blank=True, editable=False)
+
     cover_image = models.ImageField(upload_to=project_upload_to)
 
+    # Responsive cover variants written by the image job ({"cover": {...}})
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Gallery manifest for project_detail ({"before": [...], ...}), rebuilt
+    # by refresh_gallery() whenever an image changes; NULL until first built
+    gallery = models.JSONField(null=True, blank=True, editable=False)
+
     order = models.PositiveIntegerField(
         default=0,
         help_text="Manual ordering (lower number = shown first)"
@@ -155,6 +453,9 @@ class Project(models.Model):
 
     class Meta:
         ordering = ["order", "-created_at"]  # 👈 important
+        indexes = [
+            models.Index(fields=["order", "-created_at"], name="project_order_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -171,22 +472,108 @@ class Project(models.Model):
             old = Project.objects.filter(pk=self.pk).only("cover_image").first()
             cover_changed = (not old) or (old.cover_image != self.cover_image)
 
+        queue_cover = cover_changed and bool(self.cover_image)
+        if queue_cover:
+            self.mark_pending()
+
         super().save(*args, **kwargs)
 
-        if cover_changed and self.cover_image:
-            resize_image_to_exact(
-                self.cover_image,
-                width=550,
-                height=375,
-                quality=85
-            )
-            super().save(update_fields=["cover_image"])
+        # Cover resize happens in the background job queue (home/jobs.py)
+        if queue_cover:
+            self.dispatch_processing()
+
+    def process(self):
+        # Replace the uploaded cover with an exact 550x375 JPEG
+        original = self.cover_image.name
+        largest = max(RENDITION_WIDTHS["cover"])
+        img = open_image(self.cover_image, draft_size=(largest, largest))
+
+        self.render_cover_renditions(img)
+
+        self.cover_image.save(
+            derived_name(self.cover_image, ".jpg"),
+            encode_jpeg(fit_image(img, COVER_SIZE), quality=85),
+            save=False,
+        )
+        if self.cover_image.name != original:
+            self.retire_file(self.cover_image.storage, original)
+        return {"cover_image": self.cover_image.name, "renditions": self.renditions}
+
+    def rebuild(self):
+        # The cover is resized in place, so there is no original to go back
+        # to: covers already at the exact size only get new renditions.
+        with Image.open(self.cover_image) as img:
+            if img.size != COVER_SIZE:
+                return self.process()
+
+        self.render_cover_renditions(open_image(self.cover_image))
+        return {"renditions": self.renditions}
+
+    @classmethod
+    def refresh_tags_display(cls, project_ids):
+        """Recompute tags_display for the given projects (truncated to fit)."""
+        max_length = cls._meta.get_field("tags_display").max_length
+        for pk in set(project_ids):
+            names = ProjectTag.objects.filter(projects=pk).values_list("name", flat=True)
+            display = Truncator(", ".join(names)).chars(max_length)
+            cls.objects.filter(pk=pk).update(tags_display=display)
+
+    @classmethod
+    def gallery_images(cls, pk):
+        """
+        The finished images of every stage as dicts with a `stage` key, in
+        display order, fetched in one UNION query.
+        """
+        done = ProcessingStatus.DONE
+        stages = [
+            model.objects.filter(project_id=pk, processing_status=done)
+            .annotate(stage=models.Value(stage, output_field=models.CharField()))
+            .values("id", "image", "image_wm", "caption", "sort_order", "width", "height", "renditions", "stage")
+            .order_by()
+            for stage, model in GALLERY_STAGES.items()
+        ]
+        return stages[0].union(*stages[1:], all=True).order_by("sort_order", "id")
+
+    @classmethod
+    def refresh_gallery(cls, pk):
+        """
+        Rebuild and store the gallery manifest of project `pk`: everything
+        project_detail renders, as URLs, so the page needs no per-image
+        queries or storage lookups. Returns the manifest.
+        """
+        gallery = {stage: [] for stage in GALLERY_STAGES}
+        for row in cls.gallery_images(pk):
+            model = GALLERY_STAGES[row["stage"]]
+            image = model(pk=row["id"], image=row["image"], image_wm=row["image_wm"])
+            gallery[row["stage"]].append({
+                "id": row["id"],
+                "caption": row["caption"],
+                "src": (image.image_wm or image.image).url,
+                "width": row["width"],
+                "height": row["height"],
+                "thumb": image.thumb.url,
+                "renditions": {
+                    key: rendition_urls(row["renditions"], key) for key in ("thumb", "full")
+                },
+            })
+        cls.objects.filter(pk=pk).update(gallery=gallery)
+        return gallery
+
+    def processing_finished(self):
+        bump_version("projects")
+
+    def render_cover_renditions(self, img):
+        for name in rendition_names(self.renditions):
+            self.retire_file(self.cover_image.storage, name)
+        self.renditions = {
+            "cover": render_renditions(img, self.cover_image, "cover", aspect=COVER_SIZE),
+        }
 
     def __str__(self):
         return self.project_name
 
 
-class BaseProjectImage(models.Model):
+class BaseProjectImage(ProcessingStatusModel):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
 
     # ORIGINAL image (used for thumbnails – NO watermark)
@@ -202,27 +589,86 @@ class BaseProjectImage(models.Model):
     caption = models.CharField(max_length=255, blank=True)
     sort_order = models.PositiveIntegerField(default=0)
 
+    # Responsive variants written by the image job ({"thumb": ..., "full": ...})
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Size of the full (watermarked) image, recorded by the image job
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
     # Thumbnail generated from ORIGINAL image
     thumb = ImageSpecField(
         source="image",
-        processors=[ResizeToFill(600, 400)],
+        processors=[ResizeToFill(*THUMB_SIZE)],
         format="JPEG",
-        options={"quality": 82},
+        options={"quality": THUMB_QUALITY},
+        cachefile_strategy=PipelineStrategy(),
     )
 
     class Meta:
         abstract = True
         ordering = ["sort_order", "id"]
+        indexes = [
+            # A project's gallery, in display order
+            models.Index(fields=["project", "sort_order", "id"], name="%(class)s_sort"),
+        ]
 
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
+        # Watermarked copy, thumbnail and renditions are (re)made by the job
+        # for a new image or a replaced one, without touching the original
+        image_changed = True
+        if self.pk:
+            old = type(self).objects.filter(pk=self.pk).only("image").first()
+            image_changed = (not old) or (old.image != self.image)
 
-        # Create watermarked copy ONLY ONCE, without touching original
-        if is_new and self.image and not self.image_wm:
-            create_watermark(self.image, self.image_wm)
-            super().save(update_fields=["image_wm"])
+        queue_wm = image_changed and bool(self.image)
+        if queue_wm:
+            self.mark_pending()
+
+        super().save(*args, **kwargs)
 
+        if queue_wm:
+            self.dispatch_processing()
+
+    def process(self):
+        # One decode feeds both the watermarked copy and the thumbnail
+        img = open_image(self.image)
+
+        # The previous derivatives go once the new ones are saved
+        storage = self.image.storage
+        if self.image_wm:
+            self.retire_file(storage, self.image_wm.name)
+        for name in rendition_names(self.renditions):
+            self.retire_file(storage, name)
+
+        watermarked = apply_watermark(img)
+        if watermarked is not None:
+            self.image_wm.save(
+                derived_name(self.image, "_wm.jpg"),
+                encode_jpeg(watermarked, quality=85),
+                save=False,
+            )
+        else:
+            self.image_wm = ""  # not the old photo's watermark
+
+        store_cachefile(self.thumb, encode_jpeg(fit_image(img, THUMB_SIZE), quality=THUMB_QUALITY))
+
+        self.renditions = {
+            "thumb": render_renditions(img, self.image, "thumb", aspect=THUMB_SIZE),
+        }
+        if watermarked is not None:
+            self.renditions["full"] = render_renditions(watermarked, self.image, "full")
+        self.width, self.height = (img if watermarked is None else watermarked).size
+        return {
+            "image_wm": self.image_wm.name,
+            "renditions": self.renditions,
+            "width": self.width,
+            "height": self.height,
+        }
+
+    def processing_finished(self):
+        Project.refresh_gallery(self.project_id)
+        bump_version("projects")
 
 class ProjectBeforeImage(BaseProjectImage):
     pass
@@ -236,6 +682,14 @@ class ProjectAfterImage(BaseProjectImage):
     pass
 
 
+# Gallery sections of project_detail, in page order
+GALLERY_STAGES = {
+    "before": ProjectBeforeImage,
+    "construction": ProjectConstructionImage,
+    "after": ProjectAfterImage,
+}
+
+
 class LeadModel(models.Model):
     class Meta:
         verbose_name = "Lead"
@@ -261,7 +715,132 @@ class LeadModel(models.Model):
         return f"Lead Request #{self.id} from {self.name}"
 
 
-class LeadAttachment(models.Model):
+class OutboxEmail(models.Model):
+    """
+    Outgoing email, written in the same transaction as the data it is about
+    and delivered later by the outbox sender (see home/outbox.py).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbox email"
+        verbose_name_plural = "Outbox"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+    def to_message(self, connection=None):
+        return EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.to,
+            connection=connection,
+        )
+
+
+# -----------------------------------------------------------------------------
+# Video transcoding (see home/media.py)
+# -----------------------------------------------------------------------------
+
+class TranscodedMediaModel(ProcessingStatusModel):
+    """
+    Abstract base for uploads that may be videos. The media job writes a
+    faststart MP4 (`web_video`) and a poster frame, and records the
+    duration and displayed size. Subclasses name the source and poster
+    fields and declare `web_video`.
+    """
+
+    media_source_field = "file"
+    media_poster_field = "poster"
+
+    duration = models.FloatField(null=True, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def media_source(self):
+        return getattr(self, self.media_source_field)
+
+    @property
+    def playback_url(self):
+        """The transcoded MP4 once it exists, else the original upload."""
+        return (self.web_video or self.media_source).url
+
+    def queue_media(self, source_changed):
+        """Mark a new/changed video upload pending; returns whether it did."""
+        queue = source_changed and is_video_name(self.media_source.name)
+        if queue:
+            self.mark_pending()
+        return queue
+
+    def dispatch_processing(self):
+        """
+        Always left to process_media_jobs, whatever IMAGE_JOBS_ASYNC says:
+        a transcode can take minutes (MEDIA_JOB_TIMEOUT) and must never run
+        inside the request that uploaded the video.
+        """
+
+    def wants_poster(self):
+        return True
+
+    def process(self):
+        source = self.media_source
+        if not is_video_name(source.name):
+            return {}
+
+        src = local_path(source)
+        info = probe(src)
+        if info is None:
+            return {}
+
+        updates = dict(info)
+        storage = source.storage
+        with tempfile.TemporaryDirectory() as tmp:
+            web_path = os.path.join(tmp, "web.mp4")
+            transcode_web(src, web_path)
+            if self.web_video:
+                self.web_video.delete(save=False)
+            with open(web_path, "rb") as fh:
+                name = self.web_video.field.generate_filename(self, derived_name(source, "_web.mp4"))
+                updates["web_video"] = storage.save(name, File(fh))
+
+            if self.wants_poster():
+                poster_path = os.path.join(tmp, "poster.jpg")
+                extract_poster(src, poster_path, info["duration"])
+                poster = getattr(self, self.media_poster_field)
+                if poster:
+                    poster.delete(save=False)
+                with open(poster_path, "rb") as fh:
+                    name = poster.field.generate_filename(self, derived_name(source, "_poster.jpg"))
+                    updates[self.media_poster_field] = storage.save(name, File(fh))
+
+        return updates
+
+
+class LeadAttachment(TranscodedMediaModel):
     """Optional photos/videos uploaded by the customer with the consultation request."""
 
     lead = models.ForeignKey(
@@ -273,61 +852,164 @@ class LeadAttachment(models.Model):
     file = models.FileField(upload_to="lead_attachments/%Y/%m/")
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # Written by the media job for video attachments
+    web_video = models.FileField(upload_to="lead_attachments/web/%Y/%m/", blank=True, editable=False)
+    poster = models.ImageField(upload_to="lead_attachments/posters/%Y/%m/", blank=True, editable=False)
+
     class Meta:
         ordering = ["-uploaded_at", "-id"]
 
     def __str__(self):
         return f"Lead #{self.lead_id} - {self.file.name}"
 
+    def save(self, *args, **kwargs):
+        queue = self.queue_media(self._state.adding)
+        super().save(*args, **kwargs)
+        if queue:
+            self.dispatch_processing()
 
-def create_watermark(source_field, target_field, opacity=0.25, scale=0.25, margin=20):
-    """
-    Create a watermarked copy WITHOUT touching the original image.
-    """
-    if not source_field:
-        return
-
-    try:
-        base = Image.open(source_field).convert("RGBA")
 
-        watermark_path = os.path.join(
-            settings.BASE_DIR, "static", "images", "watermark.png"
-        )
-        if not os.path.exists(watermark_path):
-            return
+class ChunkOffsetMismatch(Exception):
+    """A chunk was sent for an offset the upload is not at; the client must resume."""
 
-        wm = Image.open(watermark_path).convert("RGBA")
 
-        # Resize watermark relative to image
-        wm_width = int(base.width * scale)
-        ratio = wm_width / wm.width
-        wm_height = int(wm.height * ratio)
-        wm = wm.resize((wm_width, wm_height), Image.Resampling.LANCZOS)
+class _PartFile(File):
+    """Lets FileSystemStorage move the assembled file into place instead of copying it."""
 
-        # Opacity
-        alpha = wm.split()[3]
-        alpha = ImageEnhance.Brightness(alpha).enhance(opacity)
-        wm.putalpha(alpha)
+    def temporary_file_path(self):
+        return self.file.name
 
-        # Bottom-right
-        x = base.width - wm.width - margin
-        y = base.height - wm.height - margin
-        base.alpha_composite(wm, (x, y))
 
-        base = base.convert("RGB")
+class ChunkedUpload(models.Model):
+    """
+    A lead attachment uploaded in resumable chunks before the form is
+    submitted. Chunks are appended to a partial file outside MEDIA_ROOT; on
+    completion the file is moved into lead_attachments/ and the contact form
+    refers to the upload by id (LeadForm.upload_ids).
+    """
 
-        buffer = BytesIO()
-        base.save(buffer, format="JPEG", quality=85, optimize=True)
-        buffer.seek(0)
+    class Status(models.TextChoices):
+        UPLOADING = "uploading", "Uploading"
+        COMPLETE = "complete", "Complete"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.UPLOADING)
+    file = models.FileField(upload_to="lead_attachments/%Y/%m/", blank=True)
+    # Who started it, for the per-client limits in views.chunked_upload_init
+    client_ip = models.GenericIPAddressField(null=True, blank=True, db_index=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-        name = source_field.name.rsplit(".", 1)[0] + "_wm.jpg"
-        target_field.save(name, ContentFile(buffer.read()), save=False)
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
 
-    except Exception:
-        return
+    @classmethod
+    def usage(cls, **filters):
+        """(count, declared bytes) of the uploads on disk, optionally filtered."""
+        totals = cls.objects.filter(**filters).aggregate(
+            count=models.Count("pk"), size=models.Sum("size")
+        )
+        return totals["count"], totals["size"] or 0
 
+    @property
+    def part_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f"{self.pk}.part")
+
+    def receive_chunk(self, stream, length, offset, checksum):
+        """
+        Append `length` bytes read from `stream` at `offset`, verifying their
+        SHA-256 `checksum`. The chunk is spooled to its own file first, so the
+        row lock is only held for the local append, never while the client
+        is still sending.
+        """
+        if self.status != self.Status.UPLOADING or offset != self.offset:
+            raise ChunkOffsetMismatch()
+        if offset + length > self.size:
+            raise ValidationError("Chunk goes past the declared file size.")
+
+        os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+        spool_path = f"{self.part_path}.{uuid.uuid4().hex}"
+        digest = hashlib.sha256()
+        received = 0
+        try:
+            with open(spool_path, "wb") as spool:
+                while received < length:
+                    data = stream.read(min(64 * 1024, length - received))
+                    if not data:
+                        break
+                    digest.update(data)
+                    spool.write(data)
+                    received += len(data)
+
+            if received != length:
+                raise ValidationError("Chunk was cut short.")
+            if digest.hexdigest() != checksum.lower():
+                raise ValidationError("Chunk checksum does not match.")
+            if offset == 0:
+                # Same magic-byte check as the form upload path: the
+                # client-supplied content_type proves nothing
+                from .uploadhandlers import SNIFF_BYTES, looks_like_media
+                with open(spool_path, "rb") as spool:
+                    if not looks_like_media(spool.read(SNIFF_BYTES)):
+                        raise ValidationError(f"{self.filename}: only image/video files are allowed.")
+
+            with transaction.atomic():
+                locked = ChunkedUpload.objects.select_for_update().get(pk=self.pk)
+                if locked.status != self.Status.UPLOADING or locked.offset != offset:
+                    raise ChunkOffsetMismatch()
+
+                fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT, 0o600)
+                with os.fdopen(fd, "r+b") as part, open(spool_path, "rb") as spool:
+                    part.seek(offset)
+                    shutil.copyfileobj(spool, part)
+                    part.truncate()
+
+                self.offset = offset + length
+                self.save(update_fields=["offset", "updated_at"])
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+
+    def complete(self):
+        """
+        Move the assembled file into lead_attachments/. Safe to call twice
+        at once (e.g. a client retrying a timed-out request): the row lock
+        makes the second call see the finished upload instead of a part
+        file that has already been moved.
+        """
+        with transaction.atomic():
+            upload = ChunkedUpload.objects.select_for_update().get(pk=self.pk)
+            if upload.status != self.Status.COMPLETE:
+                if upload.offset != upload.size:
+                    raise ValidationError("Upload is not finished yet.")
+
+                with open(self.part_path, "rb") as part:
+                    upload.file.save(upload.filename, _PartFile(part), save=False)
+                if os.path.exists(self.part_path):
+                    os.remove(self.part_path)
+
+                upload.status = self.Status.COMPLETE
+                upload.save(update_fields=["file", "status", "updated_at"])
+
+        self.status, self.offset, self.file = upload.status, upload.offset, upload.file
+
+    def discard(self):
+        """Delete the row and any bytes it still owns."""
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        if self.file:
+            self.file.delete(save=False)
+        self.delete()
+
+
+class VideoReview(TranscodedMediaModel):
+    media_source_field = "video"
+    media_poster_field = "thumbnail"
 
-class VideoReview(models.Model):
     title = models.CharField(max_length=200)
     customer_name = models.CharField(max_length=100, blank=True)
 
@@ -335,11 +1017,16 @@ class VideoReview(models.Model):
     video = models.FileField(upload_to="video_reviews/")
 
     # Optional: poster image so the video shows a nice preview before play
+    # (extracted from the video by the media job when left empty)
     thumbnail = models.ImageField(
         upload_to="video_reviews/thumbnails/",
         blank=True,
         null=True
     )
+    thumbnail_generated = models.BooleanField(default=False, editable=False)
+
+    # Faststart MP4 written by the media job; templates prefer it when present
+    web_video = models.FileField(upload_to="video_reviews/web/", blank=True, editable=False)
 
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
@@ -349,6 +1036,53 @@ class VideoReview(models.Model):
 
     class Meta:
         ordering = ["order", "-created_at"]
+        indexes = [
+            # Video reviews page: the featured block, then the rest through
+            # the keyset-paginated API. Booleans are part of the condition
+            # rather than the key because Django filters on them as bare
+            # `"is_featured"` / `NOT "is_featured"` terms.
+            models.Index(
+                fields=["order", "-created_at"],
+                condition=models.Q(is_active=True, is_featured=True),
+                name="videoreview_featured_idx",
+            ),
+            models.Index(
+                fields=["order", "-created_at", "id"],
+                condition=models.Q(is_active=True, is_featured=False),
+                name="videoreview_listed_idx",
+            ),
+            # Footer: most recent reviews
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(is_active=True),
+                name="videoreview_recent_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.order} - {self.title}"
+
+    def save(self, *args, **kwargs):
+        video_changed = True
+        if self.pk:
+            old = VideoReview.objects.filter(pk=self.pk).only("video", "thumbnail").first()
+            video_changed = (not old) or (old.video != self.video)
+            if old and old.thumbnail != self.thumbnail:
+                self.thumbnail_generated = False  # uploaded by hand; keep it
+
+        queue = self.queue_media(video_changed)
+        super().save(*args, **kwargs)
+        if queue:
+            self.dispatch_processing()
+
+    def wants_poster(self):
+        return not self.thumbnail or self.thumbnail_generated
+
+    def process(self):
+        updates = super().process()
+        if "thumbnail" in updates:
+            updates["thumbnail_generated"] = True
+        return updates
+
+    def processing_finished(self):
+        bump_version("video_reviews")
@@ -0,0 +1,110 @@
+"""
+Email outbox: views queue messages with queue_email() inside their
+transaction; send_outbox() delivers them in batches over one SMTP
+connection, retrying failures with exponential backoff.
+
+Run the sender with:  python manage.py send_outbox
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def queue_email(subject, body, to, from_email=None):
+    """Add a message to the outbox; it is sent after the transaction commits."""
+    email = OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+    if not settings.EMAIL_OUTBOX_ASYNC:
+        transaction.on_commit(send_outbox)
+    return email
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base, ... capped."""
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def requeue_stale(older_than=timedelta(minutes=15)):
+    """Put messages left in `sending` by a crashed sender back in the queue."""
+    return OutboxEmail.objects.filter(
+        status=OutboxEmail.Status.SENDING,
+        next_attempt_at__lte=timezone.now() - older_than,
+    ).update(status=OutboxEmail.Status.PENDING)
+
+
+def claim_batch(limit):
+    """Claim up to `limit` due messages (pending -> sending)."""
+    due = OutboxEmail.objects.filter(
+        status=OutboxEmail.Status.PENDING,
+        next_attempt_at__lte=timezone.now(),
+    ).order_by("next_attempt_at", "pk").values_list("pk", flat=True)[:limit]
+
+    claimed = []
+    for pk in due:
+        if OutboxEmail.objects.filter(pk=pk, status=OutboxEmail.Status.PENDING).update(
+            status=OutboxEmail.Status.SENDING, next_attempt_at=timezone.now()
+        ):
+            claimed.append(pk)
+    return list(OutboxEmail.objects.filter(pk__in=claimed).order_by("pk"))
+
+
+def mark_failed_attempt(email, error):
+    email.attempts += 1
+    email.last_error = error
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.Status.FAILED
+    else:
+        email.status = OutboxEmail.Status.PENDING
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_outbox(batch_size=None):
+    """
+    Send one batch of due messages over a single SMTP connection.
+    Returns (sent, failed) counts.
+    """
+    batch = claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception:
+        error = traceback.format_exc()
+        for email in batch:
+            mark_failed_attempt(email, error)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            try:
+                connection.send_messages([email.to_message(connection)])
+            except Exception:
+                mark_failed_attempt(email, traceback.format_exc())
+                failed += 1
+                continue
+
+            email.status = OutboxEmail.Status.SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.last_error = ""
+            email.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+            sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
@@ -0,0 +1,68 @@
+"""
+Batch write paths used by the views.
+
+save_lead_attachments() stores a lead's attachments all-or-nothing: the
+files that still need writing go to storage, every row goes in with one
+bulk INSERT, and if anything fails the files written here are deleted again
+so no half-saved lead is left behind. Files cannot take part in a rollback
+of the caller's transaction, so when that fails after this returned the
+caller deletes them with discard_stored_files().
+"""
+from django.db import transaction
+
+from .models import LeadAttachment, ProcessingStatus
+
+
+def save_lead_attachments(lead, files):
+    """
+    Create a LeadAttachment for each of `files` and return them.
+
+    `files` may mix storage names (str), uploads already written by
+    LeadUploadHandler (`stored_name`) and ordinary UploadedFiles, which
+    are saved to storage here and get `stored_name` set as well.
+    """
+    field = LeadAttachment._meta.get_field("file")
+    storage = field.storage
+
+    written = []
+    try:
+        names = []
+        for f in files:
+            if isinstance(f, str):
+                names.append(f)
+                continue
+            if not getattr(f, "stored_name", None):
+                f.stored_name = storage.save(
+                    field.generate_filename(None, f.name), f, max_length=field.max_length
+                )
+                written.append(f)
+            names.append(f.stored_name)
+
+        attachments = [LeadAttachment(lead=lead, file=name) for name in names]
+        # bulk_create() skips save(), so queue video jobs here
+        for attachment in attachments:
+            attachment.queue_media(source_changed=True)
+
+        with transaction.atomic():
+            LeadAttachment.objects.bulk_create(attachments)
+    except Exception:
+        discard_stored_files(written)
+        raise
+
+    for attachment in attachments:
+        if attachment.processing_status == ProcessingStatus.PENDING:
+            transaction.on_commit(attachment.dispatch_processing)
+    return attachments
+
+
+def discard_stored_files(files):
+    """
+    Delete what save_lead_attachments() (or LeadUploadHandler) wrote for
+    `files`, e.g. when the transaction the rows went into was rolled back.
+    Storage names passed as plain strings are not touched.
+    """
+    storage = LeadAttachment._meta.get_field("file").storage
+    for f in files:
+        if getattr(f, "stored_name", None):
+            storage.delete(f.stored_name)
+            f.stored_name = None
@@ -1,13 +1,22 @@
 import os
-from django.db.models.signals import post_delete
+import threading
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.conf import settings
 
+from .cache import bump_version
 from .models import (
     Project,
+    ProjectTag,
     ProjectBeforeImage,
     ProjectConstructionImage,
     ProjectAfterImage,
+    LeadAttachment,
+    Testimonial,
+    VideoReview,
+    GALLERY_STAGES,
+    delete_renditions,
 )
 
 
@@ -24,27 +33,163 @@ def delete_file(file_field):
 @receiver(post_delete, sender=ProjectBeforeImage)
 def delete_before_image_file(sender, instance, **kwargs):
     delete_file(instance.image)
+    delete_renditions(instance.image.storage, instance.renditions)
 
 
 @receiver(post_delete, sender=ProjectConstructionImage)
 def delete_construction_image_file(sender, instance, **kwargs):
     delete_file(instance.image)
+    delete_renditions(instance.image.storage, instance.renditions)
 
 
 @receiver(post_delete, sender=ProjectAfterImage)
 def delete_after_image_file(sender, instance, **kwargs):
     delete_file(instance.image)
+    delete_renditions(instance.image.storage, instance.renditions)
 
 
 @receiver(post_delete, sender=Project)
 def delete_project_cover_and_folder(sender, instance, **kwargs):
     # delete cover image
     delete_file(instance.cover_image)
+    delete_renditions(instance.cover_image.storage, instance.renditions)
 
-    # try to remove empty project folder
+    # try to remove empty project folders
     project_dir = os.path.join(settings.MEDIA_ROOT, "projects", instance.slug)
-    if os.path.isdir(project_dir):
-        try:
-            os.rmdir(project_dir)  # only removes if empty
-        except OSError:
-            pass
+    for path in (os.path.join(project_dir, "renditions"), project_dir):
+        if os.path.isdir(path):
+            try:
+                os.rmdir(path)  # only removes if empty
+            except OSError:
+                pass
+
+
+@receiver(post_delete, sender=VideoReview)
+@receiver(post_delete, sender=LeadAttachment)
+def delete_transcoded_media(sender, instance, **kwargs):
+    # only what the media job wrote; uploads are kept as before
+    delete_file(instance.web_video)
+    if sender is LeadAttachment:
+        delete_file(instance.poster)
+    elif instance.thumbnail_generated:
+        delete_file(instance.thumbnail)
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def update_project_tags_display(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse=True: tag.projects.add/remove/clear(), instance is the tag
+    if reverse and action == "pre_clear":
+        instance._cleared_project_ids = list(instance.projects.values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        project_ids = [instance.pk]
+    elif action == "post_clear":
+        project_ids = getattr(instance, "_cleared_project_ids", [])
+    else:
+        project_ids = pk_set or []
+    Project.refresh_tags_display(project_ids)
+
+
+@receiver(post_save, sender=ProjectTag)
+def update_tags_display_on_rename(sender, instance, created, **kwargs):
+    if not created:
+        Project.refresh_tags_display(instance.projects.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=ProjectTag)
+def remember_tagged_projects(sender, instance, **kwargs):
+    instance._tagged_project_ids = list(instance.projects.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=ProjectTag)
+def update_tags_display_on_delete(sender, instance, **kwargs):
+    Project.refresh_tags_display(getattr(instance, "_tagged_project_ids", []))
+
+
+# -----------------------------------------------------------------------------
+# Page cache invalidation (home/cache.py)
+# -----------------------------------------------------------------------------
+
+# Gallery images invalidate through GalleryRefresh below, after the manifest
+PROJECT_CONTENT_MODELS = (
+    Project,
+    ProjectTag,
+)
+
+
+def invalidate_project_pages(sender, **kwargs):
+    bump_version("projects")
+
+
+for model in PROJECT_CONTENT_MODELS:
+    post_save.connect(invalidate_project_pages, sender=model, dispatch_uid=f"projects-save-{model.__name__}")
+    post_delete.connect(invalidate_project_pages, sender=model, dispatch_uid=f"projects-delete-{model.__name__}")
+
+m2m_changed.connect(invalidate_project_pages, sender=Project.tags.through, dispatch_uid="projects-tags")
+
+
+@receiver(post_save, sender=VideoReview)
+@receiver(post_delete, sender=VideoReview)
+def invalidate_video_reviews(sender, **kwargs):
+    bump_version("video_reviews")
+
+
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=Testimonial)
+def invalidate_testimonials(sender, **kwargs):
+    bump_version("testimonials")
+
+
+# -----------------------------------------------------------------------------
+# Gallery manifests (Project.gallery)
+# Images finished by the job queue refresh it in processing_finished();
+# these cover admin edits (caption, order), new uploads and deletions.
+# -----------------------------------------------------------------------------
+
+class GalleryRefresh:
+    """
+    on_commit callback: rebuild the manifest of every project whose images
+    changed in the transaction, once each, and only then invalidate the
+    project pages. Bumping first would let a request in between cache the
+    old gallery under the new version.
+
+    Every change registers the thread's current batch again; the first call
+    does the work and the rest are no-ops. If the transaction rolls back the
+    batch simply stays current and runs (refreshing a few projects more than
+    needed) with the next commit.
+    """
+
+    def __init__(self):
+        self.project_ids = set()
+        self.done = False
+
+    def __call__(self):
+        if self.done:
+            return
+        self.done = True
+        if getattr(_gallery_refresh, "batch", None) is self:
+            del _gallery_refresh.batch
+        for pk in sorted(self.project_ids):
+            Project.refresh_gallery(pk)
+        bump_version("projects")
+
+
+# Per thread, like the DB connection whose transaction the batch follows
+_gallery_refresh = threading.local()
+
+
+def refresh_project_gallery(sender, instance, **kwargs):
+    batch = getattr(_gallery_refresh, "batch", None)
+    if batch is None:
+        batch = _gallery_refresh.batch = GalleryRefresh()
+    batch.project_ids.add(instance.project_id)
+    transaction.on_commit(batch)  # runs right away outside a transaction
+
+
+for model in GALLERY_STAGES.values():
+    post_save.connect(refresh_project_gallery, sender=model, dispatch_uid=f"gallery-save-{model.__name__}")
+    post_delete.connect(refresh_project_gallery, sender=model, dispatch_uid=f"gallery-delete-{model.__name__}")
@@ -0,0 +1,49 @@
+"""
+Manifest of the optimized static images written by
+`python manage.py optimize_static_images` (static/optimized/manifest.json),
+read by the {% static_picture %} and {% static_image_set %} tags.
+"""
+import json
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+OUTPUT_DIR = "optimized"
+MANIFEST_NAME = "manifest.json"
+
+
+@lru_cache(maxsize=4)
+def _read_manifest(path, mtime):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _load_manifest():
+    path = finders.find(f"{OUTPUT_DIR}/{MANIFEST_NAME}")
+    if not path:
+        return {}
+    return _read_manifest(path, os.path.getmtime(path))
+
+
+@lru_cache(maxsize=1)
+def _process_manifest():
+    return _load_manifest()
+
+
+def get_manifest():
+    """
+    The manifest as a dict ({} until the command has been run). Looked up
+    once per process; in DEBUG, re-read whenever the file changes so a new
+    optimize_static_images run shows up without a restart.
+    """
+    if settings.DEBUG:
+        return _load_manifest()
+    return _process_manifest()
+
+
+def get_variants(name):
+    """{format: [[width, static name], ...]} for static image `name`, or None."""
+    entry = get_manifest().get(name)
+    return entry and entry["formats"]
@@ -0,0 +1,140 @@
+"""
+Static files storage for production (see STORAGES in settings/production.py).
+
+On top of ManifestStaticFilesStorage's content-hashed names, collectstatic
+also:
+  - builds the CSS/JS bundles listed in settings.STATIC_BUNDLES (the files
+    base.html used to link one by one), minified, so they are hashed like
+    any other file;
+  - writes `.gz` and, when the `brotli` package is installed, `.br`
+    siblings of every text asset for Nginx's gzip_static/brotli_static.
+
+Hashed files never change, so Nginx can serve /static/ with
+`Cache-Control: public, max-age=31536000, immutable`.
+"""
+import gzip
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # optional: JS bundles are concatenated unminified
+    rjsmin = None
+
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".xml", ".ico", ".ttf", ".otf", ".eot")
+MIN_COMPRESS_SIZE = 1024
+
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)(?!data:|[a-z]+:|//|/|#)([^'")]+)\1\s*\)""", re.IGNORECASE)
+CSS_IMPORT_RE = re.compile(r"@import\s[^;]+;")
+CSS_COMMENT_RE = re.compile(r"/\*(?!!).*?\*/", re.DOTALL)
+CSS_STRING_RE = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""")
+
+
+def rebase_css_urls(css, source, target):
+    """Rewrite relative url()s in `source`'s CSS so they work from `target`."""
+    source_dir = posixpath.dirname(source)
+    target_dir = posixpath.dirname(target)
+
+    def rebase(match):
+        quote, url = match.groups()
+        path = posixpath.normpath(posixpath.join(source_dir, url))
+        return f"url({quote}{posixpath.relpath(path, target_dir)}{quote})"
+
+    return CSS_URL_RE.sub(rebase, css)
+
+
+def minify_css(css):
+    """Strip comments (except /*! licences */) and redundant whitespace."""
+    css = CSS_COMMENT_RE.sub("", css)
+    # Leave quoted strings (content: "...") alone
+    parts = CSS_STRING_RE.split(css)
+    for i in range(0, len(parts), 2):
+        part = re.sub(r"\s+", " ", parts[i])
+        part = re.sub(r"\s*([{};,>])\s*", r"\1", part)
+        parts[i] = part.replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def minify_js(js):
+    return rjsmin.jsmin(js) if rjsmin else js
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # A template referencing a missing file renders its plain name
+    # instead of failing the whole page
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # The theme CSS references images that were never shipped; keep
+            # those url()s unhashed rather than failing collectstatic
+            if content is not None:
+                raise
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name in self.build_bundles():
+                paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        if not dry_run:
+            for name in sorted(set(paths) | set(self.hashed_files.values())):
+                self.precompress(name)
+
+    def build_bundles(self):
+        """Write every STATIC_BUNDLES entry; returns the bundle names."""
+        for bundle, sources in settings.STATIC_BUNDLES.items():
+            contents = []
+            for source in sources:
+                with self.open(source) as fh:
+                    text = fh.read().decode("utf-8")
+                if bundle.endswith(".css"):
+                    text = rebase_css_urls(text, source, bundle)
+                contents.append(f"/* {source} */\n{text}")
+
+            if bundle.endswith(".css"):
+                css = "\n".join(contents)
+                # @import is only valid before every other rule
+                imports = CSS_IMPORT_RE.findall(css)
+                body = CSS_IMPORT_RE.sub("", css)
+                output = "".join(imports) + minify_css(body)
+            else:
+                output = minify_js(";\n".join(contents))
+
+            if self.exists(bundle):
+                self.delete(bundle)
+            self._save(bundle, ContentFile(output.encode("utf-8")))
+            yield bundle
+
+    def precompress(self, name):
+        if not name or not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return
+        with self.open(name) as fh:
+            data = fh.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data)))
+
+        for suffix, compressed in variants:
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
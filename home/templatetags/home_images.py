@@ -0,0 +1,82 @@
+import json
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from home.models import rendition_urls
+
+register = template.Library()
+
+MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+}
+
+
+def _urls(obj, key):
+    """
+    {"src": ..., "srcsets": {format: "url 320w, url 640w"}} for one rendition
+    set of `obj`: a model with `renditions`, or a Project.gallery entry,
+    which carries the URLs already.
+    """
+    if isinstance(obj, dict):
+        return obj.get("renditions", {}).get(key) or {}
+    return rendition_urls(getattr(obj, "renditions", None), key)
+
+
+def _srcsets(obj, key):
+    return _urls(obj, key).get("srcsets", {})
+
+
+@register.simple_tag
+def picture(obj, key, fallback="", alt="", css_class="", sizes="100vw", loading="lazy"):
+    """
+    <picture> for a model's `renditions` (see home.models.render_renditions):
+    AVIF/WebP sources plus a JPEG <img> with srcset. Falls back to a plain
+    <img> of `fallback` when the renditions have not been generated yet.
+    `fallback` may be a file (its .url is only read when needed) or a URL.
+    `obj` may also be an entry of a Project.gallery manifest.
+
+    {% picture img "thumb" fallback=img.thumb alt="..." css_class="..." sizes="25vw" %}
+    """
+    urls = _urls(obj, key)
+    srcsets = urls.get("srcsets", {})
+    if "jpeg" not in srcsets:
+        return format_html(
+            '<img class="{}" src="{}" alt="{}" loading="{}">',
+            css_class, getattr(fallback, "url", fallback), alt, loading,
+        )
+
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[fmt], srcset, sizes) for fmt, srcset in srcsets.items() if fmt != "jpeg"),
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" alt="{}" loading="{}"></picture>',
+        sources,
+        css_class,
+        urls["src"],
+        srcsets["jpeg"],
+        sizes,
+        alt,
+        loading,
+    )
+
+
+@register.filter
+def rendition_srcset(obj, key):
+    """JPEG srcset of one rendition set, e.g. for lightGallery's data-srcset."""
+    return _srcsets(obj, key).get("jpeg", "")
+
+
+@register.filter
+def rendition_sources(obj, key):
+    """Modern-format sources as JSON, for lightGallery's data-sources."""
+    return json.dumps([
+        {"type": MIME_TYPES[fmt], "srcset": srcset}
+        for fmt, srcset in _srcsets(obj, key).items()
+        if fmt != "jpeg"
+    ])
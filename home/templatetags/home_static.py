@@ -0,0 +1,87 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from ..static_images import get_variants
+from .home_images import MIME_TYPES
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    Tags for a settings.STATIC_BUNDLES entry: the single hashed, minified
+    bundle with STATIC_USE_BUNDLES on, otherwise every source file in order.
+
+    {% bundle "bundles/site.css" %}
+    """
+    paths = [name] if settings.STATIC_USE_BUNDLES else settings.STATIC_BUNDLES[name]
+    if name.endswith(".css"):
+        html = '<link href="{}" rel="stylesheet" type="text/css" />'
+    else:
+        html = '<script type="text/javascript" src="{}"></script>'
+    return format_html_join("\n", html, ((static(path),) for path in paths))
+
+
+def _static_srcset(entries):
+    return ", ".join(f"{static(name)} {width}w" for width, name in entries)
+
+
+@register.simple_tag
+def static_picture(name, alt="", css_class="", sizes="100vw", loading="lazy"):
+    """
+    <picture> for an image under static/ using the variants written by
+    `manage.py optimize_static_images`: AVIF/WebP sources (the browser takes
+    the first format it supports, which is also the smallest) and a
+    recompressed fallback. A plain <img> until the command has been run.
+
+    {% static_picture "images/slider/garage-hero.png" alt="..." css_class="hero-image" %}
+    """
+    variants = get_variants(name)
+    if not variants:
+        return format_html(
+            '<img class="{}" src="{}" alt="{}" loading="{}">',
+            css_class, static(name), alt, loading,
+        )
+
+    *modern, fallback = variants.items()
+    fallback_entries = fallback[1]
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[fmt], _static_srcset(entries), sizes) for fmt, entries in modern),
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" alt="{}" loading="{}"></picture>',
+        sources,
+        css_class,
+        static(fallback_entries[-1][1]),
+        _static_srcset(fallback_entries),
+        sizes,
+        alt,
+        loading,
+    )
+
+
+@register.simple_tag
+def static_image_set(name):
+    """
+    CSS image-set() of the largest variant in each format, for inline
+    background images; use after a plain url() declaration as the fallback.
+
+    style="background-image: url('...'); background-image: {% static_image_set "images/slider/garage-bg.png" %};"
+    """
+    variants = get_variants(name)
+    if not variants:
+        # Single quotes: this goes inside a double-quoted style attribute
+        return format_html("url('{}')", static(name))
+    return format_html(
+        "image-set({})",
+        format_html_join(
+            ", ",
+            "url('{}') type('{}')",
+            ((static(entries[-1][1]), MIME_TYPES[fmt]) for fmt, entries in variants.items()),
+        ),
+    )
@@ -1,3 +1,1160 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import Future
+from datetime import timedelta
+from html.parser import HTMLParser
+from io import BytesIO, StringIO
+from unittest import mock
+
+from PIL import Image
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+
+from . import signals
+from .cache import (
+    PAGE_GROUPS, bump_version, cache_page_versioned, get_version, get_versioned, release, set_versioned,
+)
+from .context_processors import footer_video_reviews
+from .jobs import requeue_stale, run_job
+from .models import (
+    GALLERY_STAGES, ChunkedUpload, LeadAttachment, LeadModel, OutboxEmail, ProcessingStatus, Project,
+    ProjectAfterImage, ProjectBeforeImage, ProjectConstructionImage, ProjectTag, Testimonial,
+    VideoReview, _prepared_watermark, apply_watermark, render_renditions, RENDITION_FORMATS,
+    watermark_bucket,
+)
+from .outbox import queue_email, send_outbox
+from .services import discard_stored_files, save_lead_attachments
+from .storage import minify_css, rebase_css_urls
+from .views import create_lead_async
+
+
+class ProjectsListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create_project(self, name, tags=()):
+        project = Project.objects.create(
+            project_name=name,
+            thumbnail_title=name,
+            cover_image="projects/cover.jpg",
+        )
+        project.tags.set(tags)
+        return project
+
+    def test_tags_display_follows_tag_changes(self):
+        kitchen = ProjectTag.objects.create(name="Kitchen")
+        adu = ProjectTag.objects.create(name="ADU")
+        project = self.create_project("Oak Street", [kitchen, adu])
+
+        project.refresh_from_db()
+        self.assertEqual(project.tags_display, "ADU, Kitchen")
+
+        kitchen.name = "Kitchen Remodel"
+        kitchen.save()
+        adu.delete()
+        project.refresh_from_db()
+        self.assertEqual(project.tags_display, "Kitchen Remodel")
+
+        kitchen.projects.clear()
+        project.refresh_from_db()
+        self.assertEqual(project.tags_display, "")
+
+    def test_tags_display_is_truncated_to_fit(self):
+        tags = [ProjectTag.objects.create(name=f"{i:02d} " + "x" * 47) for i in range(20)]
+        project = self.create_project("Oak Street", tags)
+
+        project.refresh_from_db()
+        self.assertEqual(len(project.tags_display), 500)
+        self.assertTrue(project.tags_display.startswith("00 xxx"))
+        self.assertTrue(project.tags_display.endswith("…"))
+
+    def test_query_count_does_not_grow_with_projects(self):
+        tags = [ProjectTag.objects.create(name=f"Tag {i}") for i in range(3)]
+        for i in range(5):
+            self.create_project(f"Project {i}", tags)
+
+        # projects + footer video reviews, whatever the number of projects/tags
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("projects"))
+
+        self.assertContains(response, "Tag 0, Tag 1, Tag 2", count=5)
+
+    def test_cached_page_is_served_without_queries(self):
+        project = self.create_project("Oak Street")
+        url = reverse("project_detail", args=[project.slug])
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, "Oak Street")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.project_name = "Elm Street"
+            project.save()
+
+        self.assertContains(self.client.get(url), "Elm Street")
+
+    @override_settings(DEBUG=True)
+    def test_pages_are_not_cached_under_debug(self):
+        project = self.create_project("Oak Street")
+        url = reverse("project_detail", args=[project.slug])
+        self.client.get(url)
+
+        Project.objects.filter(pk=project.pk).update(project_name="Elm Street")  # no version bump
+        self.assertContains(self.client.get(url), "Elm Street")
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_page_keeps_its_headers(self):
+        calls = []
+
+        @cache_page_versioned("projects")
+        def view(request):
+            calls.append(request)
+            response = HttpResponse("<p>page</p>", content_type="text/html; charset=utf-8")
+            response["Content-Language"] = "en"
+            response["Vary"] = "Accept-Language"
+            return response
+
+        view(RequestFactory().get("/page/"))
+        response = view(RequestFactory().get("/page/"))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.content, b"<p>page</p>")
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+        self.assertEqual(response["Content-Language"], "en")
+        self.assertEqual(response["Vary"], "Accept-Language")
+
+    def test_evicted_version_never_comes_back_to_an_old_value(self):
+        set_versioned("projects", "page", "v1 page")
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version("projects")
+        self.assertIsNone(get_versioned("projects", "page"))
+
+        # The version key is culled/evicted; the v1 entry is still there
+        cache.delete("home:version:projects")
+        self.assertIsNone(get_versioned("projects", "page"))
+        self.assertGreater(get_version("projects"), 1)
+
+    @override_settings(DEBUG=True)
+    def test_template_pages_are_not_cached_under_debug(self):
+        response = self.client.get(reverse("terms"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertIsNone(get_versioned(PAGE_GROUPS, "template:home/terms.html"))
+
+
+class ProjectGalleryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(
+            project_name="Gallery", thumbnail_title="Gallery", cover_image="projects/cover.jpg"
+        )
+        done = ProcessingStatus.DONE
+        renditions = {"full": {"jpeg": [[640, "projects/gallery/r/a_full_640.jpg"]]}}
+        # bulk_create(): no job dispatch and no signals
+        ProjectAfterImage.objects.bulk_create([
+            ProjectAfterImage(project=self.project, image="projects/gallery/a2.jpg", sort_order=2,
+                              processing_status=done),
+            ProjectAfterImage(project=self.project, image="projects/gallery/a1.jpg", sort_order=1,
+                              image_wm="projects/gallery/a1_wm.jpg", width=1280, height=960,
+                              renditions=renditions, processing_status=done),
+        ])
+        ProjectBeforeImage.objects.bulk_create([
+            ProjectBeforeImage(project=self.project, image="projects/gallery/b.jpg", processing_status=done),
+            ProjectBeforeImage(project=self.project, image="projects/gallery/pending.jpg",
+                               processing_status=ProcessingStatus.PENDING),
+        ])
+
+    def test_manifest_is_built_in_one_query(self):
+        with self.assertNumQueries(2):  # the UNION, then the UPDATE
+            gallery = Project.refresh_gallery(self.project.pk)
+
+        self.assertEqual([len(gallery[stage]) for stage in ("before", "construction", "after")], [1, 0, 2])
+        first = gallery["after"][0]
+        self.assertEqual(first["src"], "/media/projects/gallery/a1_wm.jpg")
+        self.assertEqual((first["width"], first["height"]), (1280, 960))
+        self.assertEqual(first["renditions"]["full"]["srcsets"]["jpeg"], "/media/projects/gallery/r/a_full_640.jpg 640w")
+        self.assertEqual(gallery["after"][1]["src"], "/media/projects/gallery/a2.jpg")
+
+    def test_detail_page_reads_only_the_project_row(self):
+        Project.refresh_gallery(self.project.pk)
+        url = reverse("project_detail", args=[self.project.slug])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        image_tables = [f'"{model._meta.db_table}"' for model in GALLERY_STAGES.values()]
+        self.assertFalse([q for q in queries if any(table in q["sql"] for table in image_tables)])
+        self.assertContains(response, 'data-src="/media/projects/gallery/a1_wm.jpg"')
+        self.assertContains(response, 'data-lg-size="1280-960"')
+
+    def test_admin_edits_refresh_each_gallery_once_before_invalidating(self):
+        Project.refresh_gallery(self.project.pk)
+
+        def bump_version(group):
+            # The page must already be rebuilt from the new manifest
+            self.assertEqual(Project.objects.get().gallery["after"][0]["caption"], "New")
+            bump(group)
+
+        bump = signals.bump_version
+        with mock.patch.object(signals, "bump_version", side_effect=bump_version) as bumped:
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    for image in ProjectAfterImage.objects.all():
+                        image.caption = "New"
+                        image.save()
+
+        self.assertEqual(sum(" UNION ALL " in q["sql"] for q in queries), 1)
+        bumped.assert_called_once_with("projects")
+
+    def test_edit_after_a_rolled_back_one_still_refreshes(self):
+        Project.refresh_gallery(self.project.pk)
+        image = ProjectAfterImage.objects.get(sort_order=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                image.caption = "Dropped"
+                image.save()
+                raise RuntimeError
+
+            image.caption = "Kept"
+            image.save()
+
+        self.assertEqual(Project.objects.get().gallery["after"][0]["caption"], "Kept")
+
+    def test_deleting_an_image_refreshes_the_manifest(self):
+        Project.refresh_gallery(self.project.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectBeforeImage.objects.get(image="projects/gallery/b.jpg").delete()
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.gallery["before"], [])
+
+
+class HomeTestimonialsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create(self, name, order, is_featured=False, is_active=True):
+        return Testimonial.objects.create(
+            name=name, message="Great work", order=order, is_featured=is_featured, is_active=is_active
+        )
+
+    def test_featured_first_then_order_limited_to_six(self):
+        for i in range(8):
+            self.create(f"Customer {i}", order=i)
+        self.create("Featured", order=99, is_featured=True)
+        self.create("Hidden", order=0, is_featured=True, is_active=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("home"))
+        self.assertEqual(sum('"home_testimonial"' in q["sql"] for q in queries), 1)
+        names = [t.name for t in response.context["testimonials"]]
+        self.assertEqual(names, ["Featured"] + [f"Customer {i}" for i in range(5)])
+
+    def test_cached_until_a_testimonial_changes(self):
+        testimonial = self.create("Before", order=0)
+        self.client.get(reverse("home"))
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse("home"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            testimonial.name = "After"
+            testimonial.save()
+
+        response = self.client.get(reverse("home"))
+        self.assertEqual([t.name for t in response.context["testimonials"]], ["After"])
+
+
+class FooterVideoReviewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def footer(self):
+        return list(footer_video_reviews(None)["footer_video_reviews"])
+
+    def test_cached_until_a_review_changes(self):
+        VideoReview.objects.bulk_create(
+            VideoReview(title=f"Review {i}", video=f"video_reviews/{i}.mp4") for i in range(3)
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.footer()), 2)
+        with self.assertNumQueries(0):
+            self.footer()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VideoReview.objects.create(title="Newest", video="video_reviews/new.mp4")
+
+        self.assertEqual(self.footer()[0].title, "Newest")
+
+    def test_untouched_unless_rendered(self):
+        with self.assertNumQueries(0):
+            footer_video_reviews(None)
+
+
+class ChromeFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        release.cache_clear()
+        self.addCleanup(release.cache_clear)
+        VideoReview.objects.bulk_create([VideoReview(title="Old title", video="video_reviews/1.mp4")])
+
+    def footer(self):
+        return self.client.get(reverse("create_lead"))
+
+    def test_footer_follows_video_review_changes(self):
+        self.assertContains(self.footer(), "Old title")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = VideoReview.objects.get()
+            review.title = "New title"
+            review.save()
+
+        self.assertContains(self.footer(), "New title")
+
+    def test_a_new_release_starts_cold(self):
+        with override_settings(RELEASE_ID="r1"):
+            self.assertContains(self.footer(), "Old title")
+            VideoReview.objects.update(title="New title")  # no signal: still cached
+            self.assertContains(self.footer(), "Old title")
+
+        release.cache_clear()
+        with override_settings(RELEASE_ID="r2"):
+            self.assertContains(self.footer(), "New title")
+
+    def test_release_defaults_to_the_manifest_hash(self):
+        with override_settings(RELEASE_ID=""):
+            with mock.patch("home.cache.staticfiles_storage") as storage:
+                storage.read_manifest.return_value = '{"paths": {"css/site.css": "css/site.abc.css"}}'
+                first = release()
+                release.cache_clear()
+                storage.read_manifest.return_value = '{"paths": {"css/site.css": "css/site.def.css"}}'
+                second = release()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(first), 12)
+
+
+class TempMediaRootMixin:
+    """Point MEDIA_ROOT at a throwaway directory for each test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, files in os.walk(self.media_root)
+            for name in files
+        )
+
+
+class WatermarkTests(TestCase):
+    def setUp(self):
+        _prepared_watermark.cache_clear()
+        self.addCleanup(_prepared_watermark.cache_clear)
+
+    def test_widths_share_a_bucket(self):
+        self.assertEqual(watermark_bucket(1), 128)
+        self.assertEqual(watermark_bucket(256), 256)
+        self.assertEqual(watermark_bucket(257), 384)
+        self.assertEqual(watermark_bucket(10_000), 2048)
+
+    def test_decoded_once_per_bucket_and_scaled_to_the_image(self):
+        for width in (1000, 1020, 1200, 4000):
+            img = Image.new("RGB", (width, 800), "white")
+            watermarked = apply_watermark(img)
+            self.assertEqual(watermarked.size, img.size)
+            self.assertEqual(img.getpixel((width - 1, 799)), (255, 255, 255))  # original untouched
+
+        # Watermarks of 250 and 255px share the 256 bucket; 300 and 1000px get 384 and 1024
+        info = _prepared_watermark.cache_info()
+        self.assertEqual((info.misses, info.hits), (3, 1))
+
+    def test_missing_watermark_file(self):
+        with override_settings(BASE_DIR=tempfile.gettempdir()):
+            self.assertIsNone(apply_watermark(Image.new("RGB", (800, 600))))
+
+
+class RenditionTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.image = ProjectAfterImage(image="projects/oak/kitchen.jpg")
+
+    def render(self, obj, **kwargs):
+        args = " ".join(f'{name}="{value}"' for name, value in kwargs.items())
+        return Template("{% load home_images %}{% picture obj 'thumb' " + args + " %}").render(
+            Context({"obj": obj})
+        )
+
+    def test_every_format_at_each_width_never_upscaled(self):
+        renditions = render_renditions(Image.new("RGB", (500, 400)), self.image.image, "thumb", aspect=(3, 2))
+
+        self.assertEqual(list(renditions), RENDITION_FORMATS)
+        self.assertIn("webp", renditions)
+        for fmt, entries in renditions.items():
+            self.assertEqual([width for width, _ in entries], [320])  # 640 would upscale
+            with Image.open(os.path.join(self.media_root, entries[0][1])) as img:
+                self.assertEqual(img.size, (320, 213))
+                self.assertEqual(img.format, {"jpeg": "JPEG", "webp": "WEBP", "avif": "AVIF"}[fmt])
+
+    def test_picture_tag(self):
+        self.image.renditions = {"thumb": render_renditions(
+            Image.new("RGB", (800, 600)), self.image.image, "thumb", aspect=(3, 2)
+        )}
+        html = self.render(self.image, alt="Kitchen", sizes="25vw")
+
+        self.assertTrue(html.startswith("<picture>"))
+        self.assertIn(
+            '<source type="image/webp" srcset="/media/projects/oak/renditions/kitchen_thumb_320.webp 320w, '
+            '/media/projects/oak/renditions/kitchen_thumb_640.webp 640w" sizes="25vw">',
+            html,
+        )
+        self.assertIn('<img class="" src="/media/projects/oak/renditions/kitchen_thumb_640.jpg"', html)
+        self.assertIn('sizes="25vw" alt="Kitchen"', html)
+        self.assertNotIn('type="image/jpeg"', html)
+
+    def test_picture_tag_falls_back_until_rendered(self):
+        html = self.render(self.image, fallback="/static/placeholder.jpg", alt="Kitchen")
+
+        self.assertEqual(html, '<img class="" src="/static/placeholder.jpg" alt="Kitchen" loading="lazy">')
+
+
+class LeadAttachmentServiceTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.lead = LeadModel.objects.create(name="Jane", email="jane@example.com", phone="555")
+
+    def uploads(self, count):
+        return [SimpleUploadedFile(f"photo{i}.jpg", b"\xff\xd8\xff" + bytes(100)) for i in range(count)]
+
+    def test_saves_every_attachment_in_one_insert(self):
+        with self.assertNumQueries(3):  # savepoint, INSERT, release
+            attachments = save_lead_attachments(self.lead, self.uploads(3) + ["lead_attachments/kept.jpg"])
+
+        self.assertEqual(self.lead.attachments.count(), 4)
+        storage = LeadAttachment._meta.get_field("file").storage
+        for attachment in attachments[:3]:
+            self.assertTrue(storage.exists(attachment.file.name))
+
+    def test_failed_insert_removes_written_files(self):
+        with mock.patch.object(LeadAttachment.objects, "bulk_create", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                save_lead_attachments(self.lead, self.uploads(3))
+
+        self.assertFalse(self.lead.attachments.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_outer_rollback_files_are_discarded_by_the_caller(self):
+        uploads = self.uploads(2)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                save_lead_attachments(self.lead, uploads + ["lead_attachments/kept.jpg"])
+                self.assertEqual(len(self.stored_files()), 2)
+                raise RuntimeError
+        discard_stored_files(uploads)
+
+        self.assertFalse(self.lead.attachments.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+def jpeg_upload(name="photo.jpg", size=(800, 600)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "steelblue").save(buffer, format="JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@override_settings(IMAGE_JOB_MAX_ATTEMPTS=3)
+class StaleJobTests(TestCase):
+    def test_requeue_counts_the_lost_run_as_an_attempt(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        Project.objects.bulk_create([
+            Project(project_name=f"P{attempts}", thumbnail_title="P", slug=f"p{attempts}",
+                    cover_image="projects/cover.jpg", processing_status=ProcessingStatus.PROCESSING,
+                    processing_attempts=attempts, processing_updated_at=long_ago)
+            for attempts in (1, 3)
+        ])
+
+        self.assertEqual(requeue_stale(["home.Project"]), (1, 1))
+        self.assertEqual(
+            dict(Project.objects.values_list("processing_attempts", "processing_status")),
+            {1: ProcessingStatus.PENDING, 3: ProcessingStatus.FAILED},
+        )
+        # Nothing left in `processing`: a second pass is a no-op
+        self.assertEqual(requeue_stale(["home.Project"]), (0, 0))
+
+
+@override_settings(IMAGE_JOBS_ASYNC=False)
+class InlineJobTests(TempMediaRootMixin, TestCase):
+    def test_job_runs_after_the_saving_transaction_commits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                project = Project.objects.create(
+                    project_name="Inline", thumbnail_title="Inline", cover_image=jpeg_upload()
+                )
+            # Still inside the test's transaction: nothing ran yet, and the
+            # connection is still usable
+            self.assertEqual(Project.objects.get().processing_status, ProcessingStatus.PENDING)
+
+        for callback in callbacks:
+            callback()
+
+        project.refresh_from_db()
+        self.assertEqual(project.processing_status, ProcessingStatus.DONE)
+        with Image.open(project.cover_image.path) as img:
+            self.assertEqual(img.size, (550, 375))
+
+    def test_video_jobs_are_always_queued(self):
+        lead = LeadModel.objects.create(name="Jane", email="jane@example.com", phone="555")
+        with self.captureOnCommitCallbacks() as callbacks:
+            attachment = LeadAttachment.objects.create(
+                lead=lead, file=SimpleUploadedFile("clip.mp4", b"\x00\x00\x00\x18ftypmp42")
+            )
+
+        self.assertEqual(callbacks, [])
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.processing_status, ProcessingStatus.PENDING)
+
+    def test_gallery_image_is_watermarked_after_commit(self):
+        project = Project.objects.create(
+            project_name="Inline", thumbnail_title="Inline", cover_image="projects/cover.jpg"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProjectAfterImage.objects.create(project=project, image=jpeg_upload(size=(1200, 900)))
+
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ProcessingStatus.DONE)
+        self.assertEqual((image.width, image.height), (1200, 900))
+        with Image.open(image.image_wm.path) as watermarked, Image.open(image.image.path) as original:
+            self.assertEqual(watermarked.size, original.size)
+            # Only the bottom-right corner is touched
+            self.assertEqual(watermarked.getpixel((10, 10)), original.getpixel((10, 10)))
+        project.refresh_from_db()
+        self.assertEqual(len(project.gallery["after"]), 1)
+
+    def test_replaced_gallery_image_is_processed_again(self):
+        project = Project.objects.create(
+            project_name="Inline", thumbnail_title="Inline", cover_image="projects/cover.jpg"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProjectAfterImage.objects.create(project=project, image=jpeg_upload("old.jpg"))
+        image.refresh_from_db()
+        old_files = [image.image_wm.name, *(name for _, name in image.renditions["thumb"]["jpeg"])]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = jpeg_upload("new.jpg", size=(1000, 700))
+            image.save()
+
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ProcessingStatus.DONE)
+        self.assertEqual((image.width, image.height), (1000, 700))
+        self.assertIn("new_wm", image.image_wm.name)
+        self.assertTrue(image.thumb.storage.exists(image.thumb.name))
+        stored = self.stored_files()
+        for name in old_files:
+            self.assertNotIn(name, stored)
+        for _, name in image.renditions["thumb"]["jpeg"]:
+            self.assertIn(name, stored)
+
+
+class InlineExecutor:
+    """Stands in for ProcessPoolExecutor: the test database is not shared with other processes."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@override_settings(IMAGE_JOBS_ASYNC=False)
+@mock.patch("home.jobs.close_old_connections", lambda: None)
+@mock.patch("home.management.commands.rebuild_project_images.ProcessPoolExecutor", InlineExecutor)
+class RebuildProjectImagesTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                project_name="Oak", thumbnail_title="Oak", cover_image=jpeg_upload("cover.jpg")
+            )
+            self.images = [
+                ProjectAfterImage.objects.create(project=self.project, image=jpeg_upload(f"{i}.jpg"))
+                for i in range(2)
+            ]
+        for image in self.images:
+            image.refresh_from_db()
+
+    def rebuild(self):
+        out = StringIO()
+        call_command("rebuild_project_images", workers=1, stdout=out)
+        return out.getvalue()
+
+    def test_derivatives_are_replaced(self):
+        old_wm = [image.image_wm.name for image in self.images]
+
+        output = self.rebuild()
+
+        self.assertIn("Rebuilt 3 image(s), 0 failed", output)
+        stored = self.stored_files()
+        for image, old in zip(self.images, old_wm):
+            image.refresh_from_db()
+            self.assertEqual(image.processing_status, ProcessingStatus.DONE)
+            self.assertIn(image.image_wm.name, stored)
+            self.assertNotIn(old, stored)
+
+    def test_a_failing_image_keeps_its_files_and_the_rest_go_on(self):
+        broken = self.images[0]
+        real_render = render_renditions
+
+        def render(img, file_field, key, aspect=None):
+            if file_field.name == broken.image.name and key == "full":
+                raise OSError("disk full")
+            return real_render(img, file_field, key, aspect)
+
+        with mock.patch("home.models.render_renditions", side_effect=render):
+            output = self.rebuild()
+
+        self.assertIn("Rebuilt 2 image(s), 1 failed", output)
+        old_wm = broken.image_wm.name
+        broken.refresh_from_db()
+        self.assertEqual(broken.processing_status, ProcessingStatus.FAILED)
+        self.assertIn("disk full", broken.processing_error)
+        # Still pointing at files that exist
+        self.assertEqual(broken.image_wm.name, old_wm)
+        stored = self.stored_files()
+        self.assertIn(old_wm, stored)
+        for _, name in broken.renditions["full"]["jpeg"]:
+            self.assertIn(name, stored)
+
+    def test_missing_watermark_clears_the_copy(self):
+        with mock.patch("home.models.get_watermark", return_value=None):
+            output = self.rebuild()
+
+        self.assertIn("0 failed", output)
+        image = ProjectAfterImage.objects.get(pk=self.images[0].pk)
+        self.assertEqual(image.image_wm.name, "")
+        self.assertNotIn("full", image.renditions)
+
+
+@override_settings(FFMPEG_BINARY="ffmpeg", FFPROBE_BINARY="ffprobe")
+class MediaJobTests(TempMediaRootMixin, TestCase):
+    """The media job with ffprobe/ffmpeg replaced by a fake that writes its output file."""
+
+    PROBE = b'{"streams": [{"width": 1920, "height": 1080, "tags": {"rotate": "90"}}], "format": {"duration": "12.5"}}'
+
+    def setUp(self):
+        super().setUp()
+        self.lead = LeadModel.objects.create(name="Jane", email="jane@example.com", phone="555")
+        self.commands = []
+
+    def fake_run(self, args, **kwargs):
+        self.commands.append(args[0])
+        if args[0] == "ffprobe":
+            return subprocess.CompletedProcess(args, 0, self.PROBE, b"")
+        with open(args[-1], "wb") as output:
+            output.write(b"rendered")
+        return subprocess.CompletedProcess(args, 0, b"", b"")
+
+    def queue_video(self):
+        return LeadAttachment.objects.create(
+            lead=self.lead, file=SimpleUploadedFile("clip.mov", b"\x00\x00\x00\x14ftypqt  ")
+        )
+
+    def test_video_gets_web_copy_poster_and_displayed_size(self):
+        attachment = self.queue_video()
+
+        with mock.patch("home.media.subprocess.run", side_effect=self.fake_run):
+            status = run_job("home.LeadAttachment", attachment.pk)
+
+        self.assertEqual(status, ProcessingStatus.DONE)
+        self.assertEqual(self.commands, ["ffprobe", "ffmpeg", "ffmpeg"])
+        attachment.refresh_from_db()
+        self.assertEqual((attachment.width, attachment.height, attachment.duration), (1080, 1920, 12.5))
+        self.assertTrue(attachment.web_video.name.endswith("clip_web.mp4"))
+        self.assertTrue(attachment.poster.name.endswith("clip_poster.jpg"))
+        self.assertEqual(attachment.playback_url, attachment.web_video.url)
+
+    def test_ffmpeg_failure_is_retried(self):
+        attachment = self.queue_video()
+        failed = subprocess.CompletedProcess([], 1, b"", b"Invalid data found")
+
+        with mock.patch("home.media.subprocess.run", return_value=failed):
+            status = run_job("home.LeadAttachment", attachment.pk)
+
+        self.assertEqual(status, ProcessingStatus.PENDING)
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.processing_attempts, 1)
+        self.assertIn("Invalid data found", attachment.processing_error)
+        self.assertFalse(attachment.web_video)
+        self.assertEqual(attachment.playback_url, attachment.file.url)
+
+
+class LeadIntakeTests(TempMediaRootMixin, TestCase):
+    CSRF_TOKEN = "a" * 32
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.cookies["csrftoken"] = self.CSRF_TOKEN
+
+    def post(self, csrf=True, **fields):
+        data = {
+            # First, like the hidden input at the top of the real form: the
+            # upload handler may stop reading the body at an attachment
+            **({"csrfmiddlewaretoken": self.CSRF_TOKEN} if csrf else {}),
+            "name": "Jane",
+            "email": "jane@example.com",
+            "phone": "555",
+            "message": "Kitchen",
+            "attachments": SimpleUploadedFile("x.jpg", b"\xff\xd8\xff\xe0" + bytes(2048), "image/jpeg"),
+            **fields,
+        }
+        return self.client.post(reverse("create_lead"), data)
+
+    def test_csrf_failure_discards_streamed_files(self):
+        response = self.post(csrf=False)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(LeadModel.objects.exists())
+
+    async def test_async_view_csrf_failure_discards_streamed_files(self):
+        request = AsyncRequestFactory().post(reverse("create_lead"), {
+            "name": "Jane",
+            "attachments": SimpleUploadedFile("x.jpg", b"\xff\xd8\xff\xe0" + bytes(2048), "image/jpeg"),
+        })
+        request.COOKIES["csrftoken"] = self.CSRF_TOKEN
+
+        response = await create_lead_async(request)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_invalid_form_discards_files(self):
+        response = self.post(email="not an email")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_saved_lead_keeps_its_files(self):
+        response = self.post()
+
+        self.assertRedirects(response, reverse("create_lead_success"))
+        attachment = LeadAttachment.objects.get()
+        self.assertEqual(self.stored_files(), [attachment.file.name])
+
+    def assertAttachmentError(self, response, message):
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(message, " ".join(response.context["lead_form"].errors["attachments"]))
+        self.assertFalse(LeadModel.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_file_is_sniffed_not_trusted_by_its_name(self):
+        script = SimpleUploadedFile("x.jpg", b"#!/bin/sh\n" + bytes(2048), "image/jpeg")
+        response = self.post(attachments=script)
+
+        self.assertAttachmentError(response, "only image/video files are allowed")
+
+    @mock.patch("home.uploadhandlers.LEAD_MAX_FILE_SIZE", 1024)
+    def test_oversized_file_stops_the_upload(self):
+        response = self.post()
+
+        self.assertAttachmentError(response, "x.jpg: exceeds")
+
+    @mock.patch("home.uploadhandlers.LEAD_MAX_FILES", 1)
+    def test_too_many_files_stops_the_upload(self):
+        photos = [
+            SimpleUploadedFile(f"{i}.jpg", b"\xff\xd8\xff\xe0" + bytes(2048), "image/jpeg")
+            for i in range(2)
+        ]
+        response = self.post(attachments=photos)
+
+        self.assertAttachmentError(response, "Please upload up to 1 files.")
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=60)
+class OutboxTests(TestCase):
+    def test_queued_email_is_sent_after_commit(self):
+        with override_settings(EMAIL_OUTBOX_ASYNC=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                queue_email("New lead", "Hello", ["office@example.com"])
+                self.assertEqual(mail.outbox, [])
+
+        self.assertEqual([m.subject for m in mail.outbox], ["New lead"])
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.Status.SENT, 1))
+
+    def test_failed_sends_back_off_then_give_up(self):
+        with override_settings(EMAIL_OUTBOX_ASYNC=True):
+            email = queue_email("New lead", "Hello", ["office@example.com"])
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("refused")
+        ):
+            self.assertEqual(send_outbox(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboxEmail.Status.PENDING, 1))
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+            self.assertIn("refused", email.last_error)
+
+            # Not due yet: nothing is claimed
+            self.assertEqual(send_outbox(), (0, 0))
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(send_outbox(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.Status.FAILED, 2))
+        self.assertEqual(mail.outbox, [])
+
+
+class VideoReviewsApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # bulk_create() so no media jobs are queued; equal `order` values
+        # make the cursor fall back to created_at and id
+        VideoReview.objects.bulk_create(
+            VideoReview(title=f"Review {i}", video=f"video_reviews/{i}.mp4", order=i % 2)
+            for i in range(8)
+        )
+
+    def test_cursor_walks_every_review_once(self):
+        url = reverse("videoreviews_api")
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(url, {"limit": 3, **({"cursor": cursor} if cursor else {})})
+            data = response.json()
+            seen += [result["id"] for result in data["results"]]
+            cursor = data["next"]
+            if not cursor:
+                break
+
+        expected = VideoReview.objects.order_by("order", "-created_at", "pk").values_list("pk", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_etag_and_bad_cursor(self):
+        url = reverse("videoreviews_api")
+        etag = self.client.get(url)["ETag"]
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {"cursor": "nope"}).status_code, 400)
+
+    def cursor(self, *values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def test_out_of_range_and_naive_cursors_are_rejected(self):
+        url = reverse("videoreviews_api")
+        now = timezone.now().isoformat()
+        for cursor in (
+            self.cursor(0, now, 2 ** 70),
+            self.cursor(-1, now, 1),
+            self.cursor(2 ** 40, now, 1),
+            self.cursor(0, "2026-01-01T00:00:00", 1),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(url, {"cursor": cursor}).status_code, 400)
+
+    def test_only_the_first_page_is_cached(self):
+        url = reverse("videoreviews_api")
+        cursor = self.client.get(url, {"limit": 3}).json()["next"]
+        with self.assertNumQueries(0):
+            self.client.get(url, {"limit": 3})
+
+        with mock.patch("home.views.get_or_set_versioned") as cached:
+            response = self.client.get(url, {"limit": 3, "cursor": cursor})
+        self.assertEqual(len(response.json()["results"]), 3)
+        cached.assert_not_called()
+
+
+class QueryPlanTests(TestCase):
+    """
+    The hot querysets are planned on the indexes declared in Meta.indexes,
+    without a separate sort step. Runs on SQLite and PostgreSQL; the tables
+    are nearly empty here, so sequential scans are disabled on PostgreSQL
+    to see which index the planner would pick.
+    """
+
+    def explain(self, queryset):
+        if connection.vendor != "postgresql":
+            return queryset.explain()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan)
+        self.assertNotRegex(plan, r"TEMP B-TREE FOR ORDER BY|Sort Key")
+
+    def test_testimonials(self):
+        self.assertUsesIndex(
+            Testimonial.objects.filter(is_active=True).order_by("-is_featured", "order")[:6],
+            "testimonial_active_idx",
+        )
+
+    def test_video_reviews(self):
+        listed = VideoReview.objects.filter(is_active=True, is_featured=False)
+        now = timezone.now()
+        self.assertUsesIndex(listed.order_by("order", "-created_at", "pk")[:7], "videoreview_listed_idx")
+        self.assertUsesIndex(
+            listed.filter(
+                Q(order__gt=1) | Q(order=1, created_at__lt=now) | Q(order=1, created_at=now, pk__gt=1)
+            ).order_by("order", "-created_at", "pk")[:7],
+            "videoreview_listed_idx",
+        )
+        self.assertUsesIndex(
+            VideoReview.objects.filter(is_active=True, is_featured=True).order_by("order", "-created_at"),
+            "videoreview_featured_idx",
+        )
+        self.assertUsesIndex(
+            VideoReview.objects.filter(is_active=True).order_by("-created_at")[:2],
+            "videoreview_recent_idx",
+        )
+
+    def test_projects(self):
+        self.assertUsesIndex(Project.objects.order_by("order", "-created_at"), "project_order_idx")
+
+    def test_project_images(self):
+        for model in (ProjectBeforeImage, ProjectConstructionImage, ProjectAfterImage):
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(
+                    model.objects.filter(project_id=1, processing_status="done"),
+                    f"{model._meta.model_name}_sort",
+                )
+
+
+class ChunkedUploadApiTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        settings_override = override_settings(CHUNKED_UPLOAD_TEMP_DIR=self.tmp_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def start(self, data, content_type="image/jpeg"):
+        response = self.client.post(
+            reverse("chunked_upload_init"),
+            {"filename": "photo.jpg", "size": len(data), "content_type": content_type},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def put(self, upload_id, chunk, offset=0):
+        return self.client.put(
+            reverse("chunked_upload", args=[upload_id]),
+            chunk,
+            content_type="application/octet-stream",
+            HTTP_X_UPLOAD_OFFSET=str(offset),
+            HTTP_X_CHUNK_SHA256=hashlib.sha256(chunk).hexdigest(),
+        )
+
+    def test_resumed_upload_is_attached_to_the_lead(self):
+        data = b"\xff\xd8\xff\xe0" + bytes(300)
+        upload_id = self.start(data)
+        self.assertEqual(self.put(upload_id, data[:100]).json()["offset"], 100)
+
+        # A chunk for the wrong offset is refused with the offset to resume from
+        response = self.put(upload_id, data[200:], offset=200)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 100)
+        state = self.client.get(reverse("chunked_upload", args=[upload_id])).json()
+        self.assertEqual(state["offset"], 100)
+
+        self.assertEqual(self.put(upload_id, data[100:], offset=100).json()["offset"], len(data))
+        response = self.client.post(reverse("chunked_upload_complete", args=[upload_id]))
+        self.assertEqual(response.json()["status"], "complete")
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+        response = self.client.post(reverse("create_lead"), {
+            "name": "Jane",
+            "email": "jane@example.com",
+            "phone": "555",
+            "message": "Kitchen",
+            "upload_ids": upload_id,
+        })
+
+        self.assertRedirects(response, reverse("create_lead_success"))
+        attachment = LeadAttachment.objects.get()
+        with attachment.file.open("rb") as stored:
+            self.assertEqual(stored.read(), data)
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_first_chunk_is_sniffed(self):
+        data = b"#!/bin/sh\n" + bytes(100)
+        upload_id = self.start(data)  # the declared content type is a lie
+
+        response = self.put(upload_id, data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["offset"], 0)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_finished_upload_completes_once_even_when_called_twice(self):
+        data = b"\xff\xd8\xff\xe0" + bytes(100)
+        upload_id = self.start(data)
+        self.assertEqual(self.put(upload_id, data).status_code, 200)
+
+        # Two requests that loaded the row before either finished
+        first, second = ChunkedUpload.objects.get(), ChunkedUpload.objects.get()
+        first.complete()
+        second.complete()
+
+        self.assertEqual(second.status, ChunkedUpload.Status.COMPLETE)
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertEqual(self.stored_files(), [first.file.name])
+        response = self.client.post(reverse("chunked_upload_complete", args=[upload_id]))
+        self.assertEqual(response.json()["status"], "complete")
+
+    @override_settings(CHUNKED_UPLOAD_MAX_PER_CLIENT=2, CHUNKED_UPLOAD_MAX_BYTES_IN_FLIGHT=1000)
+    def test_open_uploads_are_capped(self):
+        self.start(bytes(100))
+        self.start(bytes(100))
+
+        response = self.client.post(
+            reverse("chunked_upload_init"),
+            {"filename": "photo.jpg", "size": 100},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 429)
+
+        # Other clients are only bound by the total
+        response = self.client.post(
+            reverse("chunked_upload_init"),
+            {"filename": "photo.jpg", "size": 900},
+            content_type="application/json",
+            REMOTE_ADDR="10.0.0.2",
+        )
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(
+            reverse("chunked_upload_init"),
+            {"filename": "photo.jpg", "size": 800},
+            content_type="application/json",
+            REMOTE_ADDR="10.0.0.2",
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class StaticImageTagTests(TestCase):
+    def background_styles(self, content):
+        styles = []
+
+        class Collector(HTMLParser):
+            def handle_starttag(self, tag, attrs):
+                styles.extend(value for name, value in attrs if name == "style" and "background-image" in value)
+
+        Collector().feed(content.decode())
+        return styles
+
+    @mock.patch("home.static_images.get_manifest", return_value={})
+    def test_background_without_optimized_images_is_valid_html(self, get_manifest):
+        cache.clear()
+        response = self.client.get(reverse("garage"))
+
+        self.assertEqual(self.background_styles(response.content), [
+            "background-image: url('/static/images/slider/garage-bg.png'); "
+            "background-image: url('/static/images/slider/garage-bg.png');"
+        ])
+
+
+class StaticPipelineTests(TestCase):
+    def test_css_urls_are_rebased_for_the_bundle(self):
+        css = (
+            ".a{background:url(../img/a.png)} .b{src:url('fonts/b.woff')} "
+            '.c{background:url("/static/c.png")} .d{background:url(data:image/png;base64,AA==)} '
+            ".e{background:url(https://example.com/e.png)}"
+        )
+        rebased = rebase_css_urls(css, "css/plugins/theme.css", "bundles/site.css")
+
+        self.assertIn("url(../css/img/a.png)", rebased)
+        self.assertIn("url('../css/plugins/fonts/b.woff')", rebased)
+        self.assertIn('url("/static/c.png")', rebased)
+        self.assertIn("url(data:image/png;base64,AA==)", rebased)
+        self.assertIn("url(https://example.com/e.png)", rebased)
+
+    def test_minify_css(self):
+        css = """
+            /*! keep: licence */
+            /* drop this */
+            .a  >  .b ,
+            .c {
+                color : red ;
+                content: "  spaced ; out  ";
+            }
+        """
+        self.assertEqual(
+            minify_css(css),
+            '/*! keep: licence */ .a>.b,.c{color : red;content: "  spaced ; out  "}',
+        )
+
+    def test_collectstatic_builds_hashed_minified_precompressed_bundles(self):
+        source = tempfile.mkdtemp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        self.addCleanup(shutil.rmtree, root)
+        os.makedirs(os.path.join(source, "css", "theme"))
+        os.makedirs(os.path.join(source, "img"))
+        Image.new("RGB", (4, 4)).save(os.path.join(source, "img", "bg.png"))
+        with open(os.path.join(source, "css", "theme", "main.css"), "w") as fh:
+            fh.write("/* theme */\n.hero {\n  background: url(../../img/bg.png);\n}\n")
+            fh.write("".join(f".rule-{i} {{ margin : {i}px ; }}\n" for i in range(200)))
+
+        with override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=root,
+            STATIC_BUNDLES={"bundles/site.css": ["css/theme/main.css"]},
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "home.storage.PrecompressedManifestStaticFilesStorage"},
+            },
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+
+        with open(os.path.join(root, "staticfiles.json")) as fh:
+            paths = json.load(fh)["paths"]
+        bundle = os.path.join(root, paths["bundles/site.css"])
+        with open(bundle) as fh:
+            css = fh.read()
+
+        self.assertRegex(paths["bundles/site.css"], r"^bundles/site\.[0-9a-f]{12}\.css$")
+        self.assertIn(f'.hero{{background: url("../{paths["img/bg.png"]}")}}', css)
+        self.assertNotIn("/* theme */", css)
+        self.assertIn(".rule-1{margin : 1px}", css)
+        self.assertTrue(os.path.exists(bundle + ".gz"))
 
-# Create your tests here.
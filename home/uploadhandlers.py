@@ -0,0 +1,160 @@
+"""
+Upload handler for the contact form's attachments.
+
+Django's default handlers spool every file to memory/a temp file and only
+then let the form validate it, so an oversized submission is received in
+full before it is rejected. LeadUploadHandler checks the LEAD_MAX_* limits
+and the file's magic bytes while the request streams, stops reading as soon
+as something is wrong, and writes each file straight to its final
+lead_attachments/%Y/%m/ location so it never has to be copied again.
+(Under ASGI the body has already been received by then, see
+views.create_lead_async; the early stop only saves parsing and writing.)
+"""
+import os
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+
+from .forms import (
+    LEAD_MAX_FILES,
+    LEAD_MAX_FILE_SIZE,
+    LEAD_MAX_FILE_SIZE_MB,
+    LEAD_MAX_TOTAL_SIZE,
+    LEAD_MAX_TOTAL_SIZE_MB,
+)
+from .models import LeadAttachment
+
+# Room for the non-file form fields on top of the attachment limit
+FORM_FIELDS_ALLOWANCE = 1024 * 1024
+SNIFF_BYTES = 16
+
+
+def looks_like_media(head):
+    """Best-effort magic-byte check for common image and video formats."""
+    return (
+        head.startswith((
+            b"\xff\xd8\xff",            # JPEG
+            b"\x89PNG\r\n\x1a\n",       # PNG
+            b"GIF87a", b"GIF89a",       # GIF
+            b"BM",                      # BMP
+            b"II*\x00", b"MM\x00*",     # TIFF
+            b"\x1a\x45\xdf\xa3",        # WebM / Matroska
+            b"\x00\x00\x01\xba",        # MPEG program stream
+        ))
+        or (head[:4] == b"RIFF" and head[8:12] in (b"WEBP", b"AVI "))
+        or head[4:8] == b"ftyp"         # MP4 / MOV / 3GP / HEIC / AVIF
+    )
+
+
+class StoredUploadedFile(UploadedFile):
+    """An upload already written to its final place in storage (`stored_name`)."""
+
+    def __init__(self, file, name, stored_name, content_type, charset, content_type_extra):
+        super().__init__(file, name, content_type, 0, charset, content_type_extra)
+        self.stored_name = stored_name
+
+
+class LeadUploadHandler(FileUploadHandler):
+    """
+    Must be installed before request.POST/FILES are read, i.e. in a
+    csrf_exempt view that applies csrf_protect itself (see views.create_lead).
+    Files are written as they arrive, before the CSRF token has been checked,
+    so the view must call discard() on every response unless keep() was
+    called for a saved lead.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.error = None
+        self.stored_names = []
+        self.file_count = 0
+        self.total_size = 0
+        self.request_too_large = False
+
+    def abort(self, message):
+        """Stop reading the request right away; the view reports `error`."""
+        self.error = message
+        self.discard()
+        raise StopUpload(connection_reset=True)
+
+    def discard(self):
+        """Delete every file this handler has written."""
+        if getattr(self, "file", None) is not None:
+            self.file.close()
+        for name in self.stored_names:
+            default_storage.delete(name)
+        self.stored_names = []
+
+    def keep(self):
+        """The files now belong to a saved lead; discard() leaves them alone."""
+        self.stored_names = []
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Only flag it here: aborting before the CSRF token field has been
+        # parsed would turn the error into a CSRF failure.
+        self.request_too_large = content_length > LEAD_MAX_TOTAL_SIZE + FORM_FIELDS_ALLOWANCE
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        if field_name != "attachments":
+            raise SkipFile()
+
+        if self.request_too_large:
+            self.abort(
+                f"Total upload size exceeds {LEAD_MAX_TOTAL_SIZE_MB}MB limit. "
+                f"Please upload fewer files or shorter videos."
+            )
+
+        self.file_count += 1
+        if self.file_count > LEAD_MAX_FILES:
+            self.abort(f"Please upload up to {LEAD_MAX_FILES} files.")
+
+        # Reserve the final name: O_EXCL so two requests never share a file
+        field = LeadAttachment._meta.get_field("file")
+        target = field.generate_filename(None, file_name)
+        while True:
+            stored_name = default_storage.get_available_name(target)
+            path = default_storage.path(stored_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                break
+            except FileExistsError:
+                continue
+
+        self.stored_names.append(stored_name)
+        self.head = b""
+        self.file = StoredUploadedFile(
+            os.fdopen(fd, "wb"),
+            self.file_name,
+            stored_name,
+            self.content_type,
+            self.charset,
+            self.content_type_extra,
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.total_size += len(raw_data)
+        if start + len(raw_data) > LEAD_MAX_FILE_SIZE:
+            self.abort(f"{self.file_name}: exceeds {LEAD_MAX_FILE_SIZE_MB}MB limit.")
+        if self.total_size > LEAD_MAX_TOTAL_SIZE:
+            self.abort(
+                f"Total upload size exceeds {LEAD_MAX_TOTAL_SIZE_MB}MB limit. "
+                f"Please upload fewer files or shorter videos."
+            )
+
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES and not looks_like_media(self.head):
+                self.abort(f"{self.file_name}: only image/video files are allowed.")
+
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not looks_like_media(self.head):
+            self.abort(f"{self.file_name}: only image/video files are allowed.")
+
+        self.file.close()
+        self.file.size = file_size
+        return self.file
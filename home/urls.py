@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -22,10 +23,18 @@ urlpatterns = [
     path("home-additions/", views.Homeadditions.as_view(), name="homeadditions"),
 
     path("videoreviews/", views.videoreviews, name="videoreviews"),
+    path("videoreviews/api/", views.videoreviews_api, name="videoreviews_api"),
 
     # LEADS
-    path("contact/", views.create_lead, name="create_lead"),
+    path(
+        "contact/",
+        views.create_lead_async if settings.LEAD_INTAKE_ASYNC else views.create_lead,
+        name="create_lead",
+    ),
     path("contact/success/", views.create_lead_success, name="create_lead_success"),
+    path("contact/uploads/", views.chunked_upload_init, name="chunked_upload_init"),
+    path("contact/uploads/<uuid:upload_id>/", views.chunked_upload, name="chunked_upload"),
+    path("contact/uploads/<uuid:upload_id>/complete/", views.chunked_upload_complete, name="chunked_upload_complete"),
 
 
     path("copyright/", views.CopyrightPage.as_view(), name="copyright"),
@@ -1,144 +1,280 @@
-import smtplib
-
+import base64
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
-from django.core.mail import EmailMessage
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_http_methods, require_POST
 from django.views.generic import TemplateView
 
-from .forms import LeadForm
-from .models import Project, Testimonial, VideoReview, LeadAttachment
+from .cache import PAGE_GROUPS, cache_page_versioned, get_or_set_versioned, get_versioned, set_versioned
+from .forms import LEAD_MAX_FILE_SIZE, LEAD_MAX_FILE_SIZE_MB, LeadForm
+from .models import (
+    ChunkedUpload,
+    ChunkOffsetMismatch,
+    Project,
+    Testimonial,
+    VideoReview,
+)
+from .outbox import queue_email
+from .services import discard_stored_files, save_lead_attachments
+from .uploadhandlers import LeadUploadHandler
+
+
+class CachedTemplateMixin:
+    """
+    For pages that are pure templates: render once, keep the response in the
+    cache and serve it with a strong ETag and Last-Modified so browsers and
+    crawlers revalidate with a 304 instead of downloading the page again.
+    Under DEBUG the page is rendered every time, so template edits show up.
+    """
+    cache_timeout = 60 * 60 * 24
+    browser_max_age = 60 * 10
+
+    def get(self, request, *args, **kwargs):
+        if settings.DEBUG:
+            return super().get(request, *args, **kwargs)
+
+        key = f"template:{self.template_name}"
+        entry = get_versioned(PAGE_GROUPS, key)
+        if entry is None:
+            rendered = super().get(request, *args, **kwargs).render()
+            entry = {
+                "content": rendered.content,
+                "content_type": rendered["Content-Type"],
+                "etag": '"%s"' % hashlib.sha1(rendered.content).hexdigest(),
+                "last_modified": int(time.time()),
+            }
+            set_versioned(PAGE_GROUPS, key, entry, self.cache_timeout)
+
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+        response["Last-Modified"] = http_date(entry["last_modified"])
+        patch_cache_control(response, public=True, max_age=self.browser_max_age)
+        return get_conditional_response(
+            request,
+            etag=entry["etag"],
+            last_modified=entry["last_modified"],
+            response=response,
+        )
 
 
 def home(request):
     MAX_TESTIMONIALS = 6
 
-    featured = Testimonial.objects.filter(
-        is_active=True,
-        is_featured=True
-    ).order_by("order")
-
-    others = Testimonial.objects.filter(
-        is_active=True,
-        is_featured=False
-    ).order_by("order")
+    def featured_testimonials():
+        # Featured first, then by order; one query on testimonial_active_idx
+        return list(
+            Testimonial.objects.filter(is_active=True)
+            .order_by("-is_featured", "order")
+            .only("name", "photo", "rating", "message", "source_url")[:MAX_TESTIMONIALS]
+        )
 
-    testimonials = list(featured) + list(others)
-    testimonials = testimonials[:MAX_TESTIMONIALS]
+    testimonials = get_or_set_versioned("testimonials", "home", featured_testimonials)
 
     return render(request, "home/home.html", {
         "testimonials": testimonials
     })
 
 
+@cache_page_versioned("projects")
 def projects(request):
     projects = Project.objects.all()
     return render(request, "home/projects.html", {"projects": projects})
 
 
+@cache_page_versioned("projects")
 def project_detail(request, slug):
     project = get_object_or_404(Project, slug=slug)
 
-    before = project.projectbeforeimage_set.all()
-    construction = project.projectconstructionimage_set.all()
-    after = project.projectafterimage_set.all()
+    # The gallery is precomputed (Project.refresh_gallery), so the page costs
+    # this one query; images still in the job queue are not in it yet
+    gallery = project.gallery
+    if gallery is None:
+        gallery = Project.refresh_gallery(project.pk)
 
     return render(request, "home/project_detail.html", {
         "project": project,
-        "before": before,
-        "construction": construction,
-        "after": after,
+        "before": gallery.get("before", []),
+        "construction": gallery.get("construction", []),
+        "after": gallery.get("after", []),
     })
 
 
-class Video(TemplateView):
+class Video(CachedTemplateMixin, TemplateView):
     template_name = 'home/video.html'
 
 
 
 
 
-class Newconstruction(TemplateView):
+class Newconstruction(CachedTemplateMixin, TemplateView):
     template_name = 'home/newconstruction.html'
 
 
-class KitchenRemodeling(TemplateView):
+class KitchenRemodeling(CachedTemplateMixin, TemplateView):
     template_name = 'home/kitchen_remodeling.html'
 
 
-class Bathroom(TemplateView):
+class Bathroom(CachedTemplateMixin, TemplateView):
     template_name = 'home/bathroom.html'
 
 
-class Garage(TemplateView):
+class Garage(CachedTemplateMixin, TemplateView):
     template_name = 'home/garage.html'
 
 
-class Homeremodel(TemplateView):
+class Homeremodel(CachedTemplateMixin, TemplateView):
     template_name = 'home/homeremodel.html'
 
 
-class Homeadditions(TemplateView):
+class Homeadditions(CachedTemplateMixin, TemplateView):
     template_name = 'home/homeadditions.html'
 
 
-def videoreviews(request):
-    featured = VideoReview.objects.filter(is_active=True, is_featured=True).order_by("order", "-created_at")
+VIDEO_REVIEWS_PAGE_SIZE = 6
+VIDEO_REVIEWS_MAX_PAGE_SIZE = 24
+
+
+def _encode_cursor(review):
+    """Opaque keyset cursor: the (order, created_at, id) of the last row sent."""
+    raw = json.dumps([review.order, review.created_at.isoformat(), review.pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+# Column ranges (PositiveIntegerField order, BigAutoField id): anything
+# outside them can't come from _encode_cursor and would overflow the query
+_CURSOR_MAX_ORDER = 2 ** 31 - 1
+_CURSOR_MAX_PK = 2 ** 63 - 1
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        order, created_at, pk = json.loads(raw)
+        order, created_at, pk = int(order), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor.")
+    if not (0 <= order <= _CURSOR_MAX_ORDER and 0 < pk <= _CURSOR_MAX_PK) or timezone.is_naive(created_at):
+        raise ValidationError("Invalid cursor.")
+    return order, created_at, pk
 
-    qs = VideoReview.objects.filter(is_active=True, is_featured=False).order_by("order", "-created_at")
-    paginator = Paginator(qs, 6)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
 
-    # AJAX request: return only the cards
-    if request.headers.get("x-requested-with") == "XMLHttpRequest":
-        return render(request, "home/partials/_video_cards.html", {"page_obj": page_obj})
+def _video_reviews_page(after=None, limit=VIDEO_REVIEWS_PAGE_SIZE):
+    """
+    One page of the non-featured reviews, ordered by (order, -created_at, id),
+    starting after `after`, a decoded cursor. Keyset pagination: no COUNT(*) and no OFFSET, so
+    every page costs the same however deep it is. Returns (reviews, next_cursor).
+    """
+    qs = VideoReview.objects.filter(is_active=True, is_featured=False)
+    if after:
+        order, created_at, pk = after
+        qs = qs.filter(
+            Q(order__gt=order)
+            | Q(order=order, created_at__lt=created_at)
+            | Q(order=order, created_at=created_at, pk__gt=pk)
+        )
+    reviews = list(qs.order_by("order", "-created_at", "pk")[:limit + 1])
+    next_cursor = _encode_cursor(reviews[limit - 1]) if len(reviews) > limit else None
+    return reviews[:limit], next_cursor
+
+
+def videoreviews(request):
+    featured = VideoReview.objects.filter(is_active=True, is_featured=True).order_by("order", "-created_at")
+    reviews, next_cursor = _video_reviews_page()
 
     return render(request, "home/videoreviews.html", {
         "featured": featured,
-        "page_obj": page_obj,
+        "reviews": reviews,
+        "next_cursor": next_cursor,
     })
 
 
+def videoreviews_api(request):
+    """
+    "Load more" for the video reviews page:
+    GET ?cursor=<next from the previous page>&limit=<n>
+    -> {"results": [{"id", "title", "customer", "video", "poster", "w", "h"}], "next": cursor|null}
+    """
+    cursor = request.GET.get("cursor") or None
+    try:
+        after = _decode_cursor(cursor) if cursor else None
+    except ValidationError as exc:
+        return JsonResponse({"error": exc.messages[0]}, status=400)
+    try:
+        limit = min(max(int(request.GET.get("limit", VIDEO_REVIEWS_PAGE_SIZE)), 1), VIDEO_REVIEWS_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = VIDEO_REVIEWS_PAGE_SIZE
+
+    def build():
+        reviews, next_cursor = _video_reviews_page(after, limit)
+        payload = json.dumps({
+            "results": [
+                {
+                    "id": review.pk,
+                    "title": review.title,
+                    "customer": review.customer_name,
+                    "video": review.playback_url,
+                    "poster": review.thumbnail.url if review.thumbnail else None,
+                    "w": review.width,
+                    "h": review.height,
+                }
+                for review in reviews
+            ],
+            "next": next_cursor,
+        }, separators=(",", ":"))
+        return payload, '"%s"' % hashlib.sha1(payload.encode()).hexdigest()
+
+    # Only the first page is cached: every cursor is a different key, so
+    # caching the rest would let any client fill (and cull) the cache.
+    # Deeper pages are a cheap keyset query anyway.
+    if after:
+        payload, etag = build()
+    else:
+        payload, etag = get_or_set_versioned("video_reviews", f"api:start:{limit}", build)
+
+    response = HttpResponse(payload, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=60)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+@csrf_exempt
 def create_lead(request):
+    # Attachments are validated while they stream (home/uploadhandlers.py).
+    # The handler has to be installed before anything reads request.POST,
+    # so CSRF protection is applied by the inner view instead of the middleware.
+    upload_handler = LeadUploadHandler(request)
+    request.upload_handlers = [upload_handler]
+    try:
+        return _create_lead(request, upload_handler)
+    finally:
+        # Reading the CSRF token from the body already wrote the files: drop
+        # them unless the lead was saved (CSRF failure, invalid form, error)
+        upload_handler.discard()
+
+
+@csrf_protect
+def _create_lead(request, upload_handler):
     if request.method == 'POST':
-        lead_form = LeadForm(request.POST, request.FILES)
+        lead_form = _bind_lead_form(request, upload_handler)
         if lead_form.is_valid():
-            consultation_request = lead_form.save()
-
-            # Save uploaded attachments (optional)
-            uploaded_files = lead_form.cleaned_data.get("attachments") or []
-            for f in uploaded_files:
-                LeadAttachment.objects.create(lead=consultation_request, file=f)
-
-            # Prepare email content including selected consultation types
-            consultation_types_display = consultation_request.get_consultation_types_display()
-            # Include attachment names in the email (do NOT attach large files to email)
-            attachment_names = [f.name for f in uploaded_files]
-            attachments_text = (
-                "\n\nAttachments:\n" + "\n".join(f"- {n}" for n in attachment_names)
-            ) if attachment_names else ""
-
-            full_message = (
-                f"Name: {consultation_request.name}\n"
-                f"Email: {consultation_request.email}\n"
-                f"Phone: {consultation_request.phone}\n"
-                f"Consultation Types: {consultation_types_display}\n\n"
-                f"Message:\n{consultation_request.message}"
-            ) + attachments_text
-
-            try:
-                email_message = EmailMessage(
-                    subject=f'Request Consultation from {consultation_request.name}',
-                    body=full_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=['info@parvizconstruction.com'],
-                )
-                email_message.send(fail_silently=False)
-                return redirect('create_lead_success')
-            except smtplib.SMTPException:
-                messages.error(request, 'There was an error sending your request. Please try again later.')
+            _save_lead(lead_form, upload_handler)
+            return redirect('create_lead_success')
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -147,17 +283,208 @@ def create_lead(request):
     return render(request, 'home/create_lead.html', {'lead_form': lead_form})
 
 
+# CSRF check for the async view: on Django 4.2 csrf_exempt/csrf_protect
+# wrap views in sync functions, so both are done by hand here
+_csrf_check = CsrfViewMiddleware(lambda request: None)
+
+
+async def create_lead_async(request):
+    """
+    ASGI variant of create_lead (settings.LEAD_INTAKE_ASYNC). Django's
+    ASGIHandler reads the whole request body into a spooled temp file before
+    any view runs, so this does not reject an upload any earlier than
+    create_lead: LeadUploadHandler's checks only run once it has arrived. What
+    it saves is the thread: a slow upload holds none while it trickles in.
+    Parsing the spooled body (which writes the attachments), validation and
+    the DB writes run in a worker thread; the notification goes to the outbox
+    like in create_lead.
+    """
+    upload_handler = LeadUploadHandler(request)
+    request.upload_handlers = [upload_handler]
+    try:
+        return await _create_lead_async(request, upload_handler)
+    finally:
+        upload_handler.discard()  # unless the lead was saved, see create_lead
+
+
+async def _create_lead_async(request, upload_handler):
+    if request.method == 'POST':
+        rejected = await sync_to_async(_csrf_check.process_view)(request, None, (), {})
+        if rejected is not None:
+            return rejected
+
+        lead_form = await sync_to_async(_bind_lead_form)(request, upload_handler)
+        if await sync_to_async(lead_form.is_valid)():
+            await sync_to_async(_save_lead)(lead_form, upload_handler)
+            return redirect('create_lead_success')
+        messages.error(request, 'Please correct the errors below.')
+    else:
+        lead_form = LeadForm()
+
+    # Rendering reads the (cached) footer reviews, i.e. may query
+    return await sync_to_async(render)(request, 'home/create_lead.html', {'lead_form': lead_form})
+
+
+create_lead_async.csrf_exempt = True
+
+
+def _bind_lead_form(request, upload_handler):
+    """LeadForm for a POST; reading request.POST/FILES runs the upload handler."""
+    lead_form = LeadForm(request.POST, request.FILES)
+    if upload_handler.error:
+        lead_form.add_error("attachments", upload_handler.error)
+    return lead_form
+
+
+def _save_lead(lead_form, upload_handler):
+    """
+    Lead, attachments and notification are committed together; only then
+    do the uploaded files stop being discarded with the request.
+    """
+    try:
+        with transaction.atomic():
+            consultation_request = lead_form.save()
+            _save_lead_content(lead_form, consultation_request)
+    except Exception:
+        # The rows were rolled back; so must the files written for them
+        discard_stored_files(lead_form.cleaned_data.get("attachments") or [])
+        raise
+    upload_handler.keep()
+    return consultation_request
+
+
+def _save_lead_content(lead_form, consultation_request):
+    """Attachments and the notification email for a freshly saved lead."""
+    # Uploaded attachments (already written to lead_attachments/ by the
+    # upload handler) plus those that arrived through the chunked upload API
+    uploaded_files = lead_form.cleaned_data.get("attachments") or []
+    chunked_uploads = lead_form.cleaned_data.get("upload_ids") or []
+    save_lead_attachments(
+        consultation_request,
+        [*uploaded_files, *(upload.file.name for upload in chunked_uploads)],
+    )
+    ChunkedUpload.objects.filter(pk__in=[u.pk for u in chunked_uploads]).delete()
+
+    # Prepare email content including selected consultation types
+    consultation_types_display = consultation_request.get_consultation_types_display()
+    # Include attachment names in the email (do NOT attach large files to email)
+    attachment_names = [f.name for f in uploaded_files] + [u.filename for u in chunked_uploads]
+    attachments_text = (
+        "\n\nAttachments:\n" + "\n".join(f"- {n}" for n in attachment_names)
+    ) if attachment_names else ""
+
+    full_message = (
+        f"Name: {consultation_request.name}\n"
+        f"Email: {consultation_request.email}\n"
+        f"Phone: {consultation_request.phone}\n"
+        f"Consultation Types: {consultation_types_display}\n\n"
+        f"Message:\n{consultation_request.message}"
+    ) + attachments_text
+
+    # Delivered by the outbox sender (home/outbox.py), not in this request
+    queue_email(
+        subject=f'Request Consultation from {consultation_request.name}',
+        body=full_message,
+        to=['info@parvizconstruction.com'],
+    )
+
+
+def _upload_state(upload):
+    return {
+        "id": str(upload.pk),
+        "offset": upload.offset,
+        "size": upload.size,
+        "status": upload.status,
+        "chunk_size": settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+    }
+
+
+@require_POST
+def chunked_upload_init(request):
+    """Start a resumable upload: {"filename", "size", "content_type"} -> upload state."""
+    try:
+        data = json.loads(request.body)
+        filename = os.path.basename(str(data["filename"]))[:255]
+        size = int(data["size"])
+        content_type = str(data.get("content_type") or "")[:100]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Invalid upload request."}, status=400)
+
+    if not filename or size <= 0:
+        return JsonResponse({"error": "Invalid upload request."}, status=400)
+    if size > LEAD_MAX_FILE_SIZE:
+        return JsonResponse({"error": f"{filename}: exceeds {LEAD_MAX_FILE_SIZE_MB}MB limit."}, status=400)
+    if content_type and not content_type.startswith(("image/", "video/")):
+        return JsonResponse({"error": f"{filename}: only image/video files are allowed."}, status=400)
+
+    # Uploads sit on disk until a lead claims them or they expire, so
+    # bound what one client, and everyone together, can park there
+    client_ip = request.META.get("REMOTE_ADDR") or None
+    count, in_flight = ChunkedUpload.usage(client_ip=client_ip)
+    if (
+        count >= settings.CHUNKED_UPLOAD_MAX_PER_CLIENT
+        or in_flight + size > settings.CHUNKED_UPLOAD_MAX_BYTES_PER_CLIENT
+    ):
+        return JsonResponse({"error": "Too many uploads in progress. Please try again later."}, status=429)
+    if ChunkedUpload.usage()[1] + size > settings.CHUNKED_UPLOAD_MAX_BYTES_IN_FLIGHT:
+        return JsonResponse({"error": "Uploads are temporarily unavailable. Please try again later."}, status=429)
+
+    upload = ChunkedUpload.objects.create(
+        filename=filename, size=size, content_type=content_type, client_ip=client_ip
+    )
+    return JsonResponse(_upload_state(upload), status=201)
+
+
+@require_http_methods(["GET", "PUT"])
+def chunked_upload(request, upload_id):
+    """
+    GET: current state (how far to resume from).
+    PUT: one chunk as the raw body, with X-Upload-Offset and X-Chunk-SHA256 headers.
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id)
+    if request.method == "GET":
+        return JsonResponse(_upload_state(upload))
+
+    try:
+        offset = int(request.headers["X-Upload-Offset"])
+        checksum = request.headers["X-Chunk-SHA256"]
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "Missing chunk headers."}, status=400)
+    if not 0 < length <= settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+        return JsonResponse({"error": "Invalid chunk size."}, status=400)
+
+    try:
+        upload.receive_chunk(request, length, offset, checksum)
+    except ChunkOffsetMismatch:
+        upload.refresh_from_db()
+        return JsonResponse(_upload_state(upload), status=409)
+    except ValidationError as exc:
+        return JsonResponse({"error": exc.messages[0], **_upload_state(upload)}, status=400)
+    return JsonResponse(_upload_state(upload))
+
+
+@require_POST
+def chunked_upload_complete(request, upload_id):
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id)
+    try:
+        upload.complete()
+    except ValidationError as exc:
+        return JsonResponse({"error": exc.messages[0], **_upload_state(upload)}, status=409)
+    return JsonResponse(_upload_state(upload))
+
+
 def create_lead_success(request):
     return render(request, 'home/createlead_success.html')
 
 
-class CopyrightPage(TemplateView):
+class CopyrightPage(CachedTemplateMixin, TemplateView):
     template_name = "home/copyright.html"
 
 
 
-class Terms(TemplateView):
+class Terms(CachedTemplateMixin, TemplateView):
     template_name = "home/terms.html"
 
-class Privacy(TemplateView):
+class Privacy(CachedTemplateMixin, TemplateView):
     template_name = "home/privacy.html"
\ No newline at end of file
@@ -76,6 +76,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'home.context_processors.footer_video_reviews',
+                'home.context_processors.chrome_cache',
             ],
         },
     },
@@ -122,6 +123,37 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# CSS/JS that base.html loads on every page, in order. {% bundle %} links
+# the files one by one unless STATIC_USE_BUNDLES is on; collectstatic with
+# home.storage.PrecompressedManifestStaticFilesStorage builds the bundles.
+STATIC_BUNDLES = {
+    "bundles/site.css": [
+        "css/bootstrap.min.css",
+        "css/plugins-css.css",
+        "css/mega-menu/mega_menu.css",
+        "css/default.css",
+        "css/style.css",
+        "css/responsive.css",
+        "css/custom.css",
+    ],
+    "bundles/site.js": [
+        "js/jquery.min.js",
+        "js/bootstrap.min.js",
+        "js/plugins-jquery.js",
+        "js/mega-menu/mega_menu.js",
+        "js/social/socialstream.jquery.js",
+        "js/isotope/isotope.pkgd.min.js",
+        "js/popup/jquery.magnific-popup.js",
+        "js/wow.min.js",
+        "js/jquery.appear.js",
+        "js/custom.js",
+    ],
+}
+STATIC_USE_BUNDLES = False
+
+# Widths written by `manage.py optimize_static_images` (static/optimized/)
+STATIC_IMAGE_WIDTHS = (480, 960, 1440, 1920)
+
 # -----------------------------------------------------------------------------
 # Upload limits / safety
 # - Big files will stream to disk once they exceed FILE_UPLOAD_MAX_MEMORY_SIZE.
@@ -132,6 +164,28 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DATA_UPLOAD_MAX_MEMORY_SIZE = 25 * 1024 * 1024      # 25MB (POST data)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 25 * 1024 * 1024      # 25MB (file buffering)
 
+# Resumable chunked uploads for lead attachments (contact/uploads/ API).
+# Partial files live outside MEDIA_ROOT (same disk, so completion is a rename);
+# abandoned ones are removed by: python manage.py cleanup_chunked_uploads
+CHUNKED_UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'upload_tmp')
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024         # suggested to the browser
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 32 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+# Uploads not yet claimed by a lead (started or finished) count against these
+# until they expire. Per client = per REMOTE_ADDR: behind a proxy, make sure it
+# is the visitor's address (nginx real_ip), or everyone shares one quota.
+CHUNKED_UPLOAD_MAX_PER_CLIENT = 20
+CHUNKED_UPLOAD_MAX_BYTES_PER_CLIENT = 6 * 1024 ** 3   # one lead's worth (LEAD_MAX_TOTAL_SIZE)
+CHUNKED_UPLOAD_MAX_BYTES_IN_FLIGHT = 50 * 1024 ** 3  # keep below the free space of the upload disk
+
+# Serve contact/ with the async lead view (home.views.create_lead_async) when
+# running under ASGI. Django's ASGI handler still receives the whole body
+# (spooled to a temp file) before the view runs, so size/type checks happen
+# after the upload arrived; the gain is that a slow upload holds no worker
+# thread while it is being received. Production forces CONN_MAX_AGE=0 with it.
+# Compare with: python manage.py loadtest_lead_uploads
+LEAD_INTAKE_ASYNC = os.environ.get("LEAD_INTAKE_ASYNC", "").lower() in ("1", "true", "yes")
+
 
 
 
@@ -146,9 +200,87 @@ EMAIL_PORT = 587
 EMAIL_HOST_USER = ''  # override in production.py or local.py
 EMAIL_HOST_PASSWORD = ''  # override in production.py or local.py
 DEFAULT_FROM_EMAIL = "PC New Lead <info@parvizconstruction.com>"
+
+# Outbox (see home/outbox.py): requests only queue mail; deliver it with
+#   python manage.py send_outbox
+# Set EMAIL_OUTBOX_ASYNC = False (e.g. in local.py) to send right after commit.
+EMAIL_OUTBOX_ASYNC = True
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+EMAIL_OUTBOX_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 6 * 60 * 60
 # -----------------------------------------------------------------------------
 # Default primary key
 # -----------------------------------------------------------------------------
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# -----------------------------------------------------------------------------
+# Background image jobs (see home/jobs.py)
+# - Uploads only queue work; run workers with: python manage.py process_image_jobs
+# - Set IMAGE_JOBS_ASYNC = False (e.g. in local.py) to process inline instead.
+# -----------------------------------------------------------------------------
+
+IMAGE_JOBS_ASYNC = True
+IMAGE_JOB_MAX_ATTEMPTS = 3
+IMAGE_JOB_RETRY_DELAY = 60  # seconds before a failed job is retried
+
+# Video jobs (web MP4 + poster) share the queue and retry settings above,
+# but always run in the background, even with IMAGE_JOBS_ASYNC = False;
+# run them with: python manage.py process_media_jobs
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("FFPROBE_BINARY", "ffprobe")
+MEDIA_WEB_MAX_HEIGHT = 1080
+MEDIA_WEB_MAX_BITRATE = 2500  # kbit/s
+MEDIA_JOB_TIMEOUT = 30 * 60  # seconds per ffmpeg run
+
+# -----------------------------------------------------------------------------
+# Cache
+# - Dev: per-process memory. Production (see production.py): one cache shared
+#   by every gunicorn worker, file-based by default or Redis with
+#   CACHE_BACKEND=redis (needs the `redis` package) and CACHE_LOCATION.
+# - The home app namespaces ("home:") and versions everything it stores
+#   through home/cache.py; bump CACHE_VERSION to drop the whole cache on deploy.
+# -----------------------------------------------------------------------------
+
+CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "parvizconstruction",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("CACHE_LOCATION", os.path.join(BASE_DIR, "cache")),
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    },
+}
+
+CACHE_OPTIONS = {
+    "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", "parvizconstruction"),
+    "VERSION": int(os.environ.get("CACHE_VERSION", 1)),
+    "TIMEOUT": 60 * 60 * 24,
+}
+
+CACHES = {
+    "default": {**CACHE_BACKENDS[os.environ.get("CACHE_BACKEND", "locmem")], **CACHE_OPTIONS},
+}
+
+# navbar/footer fragments in base.html (versioned, see home.context_processors)
+CHROME_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Part of every home.cache key, so a deploy never serves HTML cached with the
+# previous static URLs. Empty = a hash of the collectstatic manifest.
+RELEASE_ID = os.environ.get("RELEASE_ID", "")
+
+# imagekit: thumbnails are written by the image job (home.models.PipelineStrategy),
+# so `.url` never checks storage. When imagekit does need to know whether a
+# cache file exists, remember the answer in the cache instead of re-stat'ing.
+IMAGEKIT_CACHE_BACKEND = 'default'
+IMAGEKIT_CACHE_PREFIX = 'home:imagekit:'
+IMAGEKIT_CACHE_TIMEOUT = None  # never expire "file exists" state
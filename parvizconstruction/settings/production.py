@@ -27,8 +27,18 @@ ALLOWED_HOSTS = [
 # Database:
 # PostgreSQL in production
 # SQLite fallback on local machine
+#
+# - Connections are kept open between requests (DB_CONN_MAX_AGE seconds,
+#   0 = close after every request, always 0 with LEAD_INTAKE_ASYNC) and
+#   checked before reuse, so a restarted PostgreSQL doesn't cost a failed
+#   request.
+# - DB_PGBOUNCER=1 when HOST/PORT point at pgbouncer in transaction pooling
+#   mode: server-side cursors (.iterator()) don't survive across pooled
+#   transactions, so Django must not use them.
+# Measure the difference with: python manage.py benchmark_requests --compare
 # ----------------------------------------------------------------------
 
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "").lower() in ("1", "true", "yes")
 
 DATABASES = {
     "default": {
@@ -36,11 +46,41 @@ DATABASES = {
         "NAME": "parvizconstruction_db",
         "USER": "parviz",
         "PASSWORD": os.environ.get("DB_PASSWORD"),
-        "HOST": "localhost",
-        "PORT": "5432",
+        "HOST": os.environ.get("DB_HOST", "localhost"),
+        "PORT": os.environ.get("DB_PORT", "6432" if DB_PGBOUNCER else "5432"),
+        # Under ASGI (LEAD_INTAKE_ASYNC) every sync_to_async call may run in a
+        # different thread, and persistent connections are per thread: they
+        # would pile up and never be reused, so close them after each request
+        "CONN_MAX_AGE": 0 if LEAD_INTAKE_ASYNC else int(os.environ.get("DB_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
+        "OPTIONS": {
+            "connect_timeout": 5,
+        },
     }
 }
 
+# ----------------------------------------------------------------------
+# Templates: compiled once per process by the cached loader
+# (APP_DIRS must be off when loaders are listed explicitly)
+# ----------------------------------------------------------------------
+
+TEMPLATES[0]["APP_DIRS"] = False
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    ("django.template.loaders.cached.Loader", [
+        "django.template.loaders.filesystem.Loader",
+        "django.template.loaders.app_directories.Loader",
+    ]),
+]
+
+# ----------------------------------------------------------------------
+# Cache: shared by all gunicorn workers (see CACHE_BACKENDS in base.py)
+# ----------------------------------------------------------------------
+
+CACHES = {
+    "default": {**CACHE_BACKENDS[os.environ.get("CACHE_BACKEND", "file")], **CACHE_OPTIONS},
+}
+
 # ----------------------------------------------------------------------
 # Static & Media (served by Nginx)
 # ----------------------------------------------------------------------
@@ -49,6 +89,16 @@ DATABASES = {
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# collectstatic writes content-hashed names, the STATIC_BUNDLES bundles and
+# .gz/.br siblings (home/storage.py), so Nginx can serve /static/ with
+#   gzip_static on; brotli_static on;
+#   add_header Cache-Control "public, max-age=31536000, immutable";
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "home.storage.PrecompressedManifestStaticFilesStorage"},
+}
+STATIC_USE_BUNDLES = True
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 